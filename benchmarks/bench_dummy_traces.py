@@ -0,0 +1,53 @@
+"""Benchmark of laying out subplots with dummy traces.
+
+Time of ``_laid_out_dict()`` (arranging traces and adding dummy traces
+required to show mirror and minor ticks) is measured for grids
+of subplots of increasing size and each dummy trace mode.
+
+Usage::
+
+  python benchmarks/bench_dummy_traces.py [SIZE ...]
+
+"""
+
+import io
+import sys
+import time
+import contextlib as cl
+
+import numpy as np
+import tk_plot_utils as tk
+
+def bench(size, share, mode):
+  """Return the number of dummy traces and time (in seconds)
+  to lay out a grid of ``size`` x ``size`` subplots."""
+  traces = [
+    [tk.make_scatter({"y": np.arange(3.0)})[0] for _ in range(size)]
+    for _ in range(size)]
+
+  fig = tk.figure()
+  fig.set_dummy_trace_mode(mode)
+
+  with cl.redirect_stdout(io.StringIO()):
+    fig.subplots(traces, share=share)
+
+  start = time.perf_counter()
+  figure = fig._laid_out_dict()
+  elapsed = time.perf_counter() - start
+
+  return len(figure["data"]) - size*size, elapsed
+
+def main(sizes):
+  print("{:>7} {:>5} {:>8} {:>8} {:>9}".format(
+    "grid", "share", "mode", "dummies", "time [s]"))
+
+  for size in sizes:
+    for share in ("", "xy"):
+      for mode in ("product", "shared"):
+        num, elapsed = bench(size, share, mode)
+        print("{:>7} {:>5} {:>8} {:>8} {:>9.3f}".format(
+          "{0}x{0}".format(size), share or "-", mode, num, elapsed),
+          flush=True)
+
+if __name__ == "__main__":
+  main([int(a) for a in sys.argv[1:]] or [2, 4, 6, 10, 20])
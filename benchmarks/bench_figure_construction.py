@@ -0,0 +1,79 @@
+"""Benchmark of constructing figures.
+
+Time and retained memory per figure are measured for Plotly's figures
+and figures of this package, constructing them empty and building
+a simple plot (setting data and titles, and laying out all traces).
+
+Usage::
+
+  python benchmarks/bench_figure_construction.py [NUMBER]
+
+"""
+
+import gc
+import io
+import sys
+import time
+import tracemalloc
+import contextlib as cl
+
+import numpy as np
+import plotly.graph_objs as pltgo
+import tk_plot_utils as tk
+
+def build(cls):
+  """Build a simple plot using the given class of this package."""
+  fig = cls()
+
+  with cl.redirect_stdout(io.StringIO()):
+    fig._set_data(tk.make_scatter({"x": [1, 2, 3], "y": [1, 4, 9]}))
+
+  fig.set_x_title("x")
+  fig.set_y_title("y")
+  fig._laid_out_dict()
+
+  return fig
+
+def bench(func, number):
+  """Return time (in milliseconds) and retained memory (in KiB)
+  per figure made by the given function."""
+  func()
+
+  elapsed = np.inf
+
+  for _ in range(3):
+    gc.collect()
+    start = time.perf_counter()
+    figs = [func() for _ in range(number)]
+    elapsed = min(elapsed, time.perf_counter() - start)
+    del figs
+
+  gc.collect()
+
+  # memory is measured separately since tracing slows down everything
+  tracemalloc.start()
+  figs = [func() for _ in range(number)]
+  current, _ = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+
+  return 1e3*elapsed/number, current/1024/number
+
+def main(number):
+  cases = [
+    ("pltgo.Figure()", pltgo.Figure),
+    ("pltgo.FigureWidget()", pltgo.FigureWidget),
+    ("ExtendedFigure()", tk.figure),
+    ("ExtendedFigureWidget()", tk.plotly),
+    ("ExtendedFigure (build)", lambda: build(tk.figure)),
+    ("ExtendedFigureWidget (build)", lambda: build(tk.plotly)),
+  ]
+
+  print("{:<30} {:>10} {:>12}".format("", "time [ms]", "memory [KiB]"))
+
+  for name, func in cases:
+    elapsed, memory = bench(func, number)
+    print("{:<30} {:>10.1f} {:>12.1f}".format(name, elapsed, memory),
+      flush=True)
+
+if __name__ == "__main__":
+  main(int(sys.argv[1]) if sys.argv[1:] else 100)
@@ -0,0 +1,62 @@
+"""Benchmark of making subplots.
+
+Time of ``subplots()`` (adding traces and creating axes of the grid)
+and of laying out all traces is measured for grids of subplots
+of increasing size and each share option. Time of ``subplots()``
+for grids of at least ``BUDGET_CELLS`` cells is checked against
+``BUDGET``.
+
+Usage::
+
+  python benchmarks/bench_subplots.py [SIZE ...]
+
+"""
+
+import io
+import sys
+import time
+import contextlib as cl
+
+import numpy as np
+import tk_plot_utils as tk
+
+# `subplots()` of a grid of 400 cells should take less than a second
+BUDGET_CELLS = 400
+BUDGET = 1.0
+
+def bench(size, share):
+  """Return time (in seconds) to make and to lay out a grid
+  of ``size`` x ``size`` subplots."""
+  traces = [
+    [tk.make_scatter({"y": np.arange(3.0)})[0] for _ in range(size)]
+    for _ in range(size)]
+
+  fig = tk.figure()
+
+  start = time.perf_counter()
+  with cl.redirect_stdout(io.StringIO()):
+    fig.subplots(traces, share=share)
+  made = time.perf_counter()
+  fig._laid_out_dict()
+  laid_out = time.perf_counter()
+
+  return made - start, laid_out - made
+
+def main(sizes):
+  print("{:>7} {:>5} {:>14} {:>14} {:>8}".format(
+    "grid", "share", "subplots [s]", "layout [s]", "budget"))
+
+  for size in sizes:
+    for share in ("", "x", "y", "xy"):
+      made, laid_out = bench(size, share)
+
+      budget = "-"
+      if size*size >= BUDGET_CELLS:
+        budget = "ok" if made < BUDGET else "over"
+
+      print("{:>7} {:>5} {:>14.3f} {:>14.3f} {:>8}".format(
+        "{0}x{0}".format(size), share or "-", made, laid_out, budget),
+        flush=True)
+
+if __name__ == "__main__":
+  main([int(a) for a in sys.argv[1:]] or [2, 5, 10, 20])
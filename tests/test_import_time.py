@@ -0,0 +1,41 @@
+"""Regression test of time to import tk_plot_utils."""
+
+import os
+import sys
+import time
+import subprocess
+
+# budget of `import tk_plot_utils` on top of interpreter startup (seconds);
+# importing plotly (which must be deferred) takes more than a second
+IMPORT_TIME_BUDGET = 0.3
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _run(code):
+  """Run the given code in a new interpreter, then return its output
+  and the best elapsed time (in seconds) of three runs."""
+  env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+    filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+  best = float("inf")
+
+  for _ in range(3):
+    start = time.perf_counter()
+    output = subprocess.run(
+      [sys.executable, "-c", code], env=env, check=True,
+      stdout=subprocess.PIPE, universal_newlines=True).stdout
+    best = min(best, time.perf_counter() - start)
+
+  return output, best
+
+def test_import_time():
+  _, startup = _run("pass")
+  _, elapsed = _run("import tk_plot_utils")
+
+  assert elapsed - startup < IMPORT_TIME_BUDGET
+
+def test_import_defers_plotly():
+  output, _ = _run(
+    "import sys, tk_plot_utils; "
+    "print(sorted(m for m in ('plotly', 'IPython') if m in sys.modules))")
+
+  assert output.strip() == "[]"
@@ -1,26 +1,45 @@
 """An interface to Plotly"""
 
+import importlib
+
 from ._version import __version__
 
-from .plotly_html import init_plotly
-from .plotly_reference import (
-  ref_scatter_marker_symbol, ref_scatter_line_dash)
-from .plotly_traces import (
-  make_scatter, make_heatmap)
-from .plotly_utils import tools
-from .plotly_utils import plt as pl
-from .plotly_utils import pltgo as go
-from .plotly_utils import ExtendedFigureWidget as plotly
-
-__all__ = [
-  "__version__",
-  "pl",
-  "go",
-  "plotly",
-  "make_scatter",
-  "make_heatmap",
-  "ref_scatter_marker_symbol",
-  "ref_scatter_line_dash",
-  "init_plotly",
-  "tools",
-]
+# exported names are imported lazily (at their first access)
+# because importing plotly and IPython takes a long time;
+# values are pairs of submodule and name in the submodule
+_lazy_exports = {
+  "pl": (".plotly_utils", "plt"),
+  "go": (".plotly_utils", "pltgo"),
+  "plotly": (".plotly_utils", "ExtendedFigureWidget"),
+  "figure": (".plotly_utils", "ExtendedFigure"),
+  "make_scatter": (".plotly_traces", "make_scatter"),
+  "make_heatmap": (".plotly_traces", "make_heatmap"),
+  "ref_scatter_marker_symbol": (
+    ".plotly_reference", "ref_scatter_marker_symbol"),
+  "ref_scatter_line_dash": (".plotly_reference", "ref_scatter_line_dash"),
+  "scatter_marker_symbols": (".plotly_reference", "scatter_marker_symbols"),
+  "scatter_line_dashes": (".plotly_reference", "scatter_line_dashes"),
+  "init_plotly": (".plotly_html", "init_plotly"),
+  "tools": (".plotly_utils", "tools"),
+  "render_many": (".plotly_batch", "render_many"),
+  "write_report": (".plotly_report", "write_report"),
+  "count_array_copies": (".utility_functions", "count_array_copies"),
+}
+
+__all__ = ["__version__"] + list(_lazy_exports)
+
+def __getattr__(name):
+  """Import an exported name at its first access."""
+  try:
+    module_name, attr = _lazy_exports[name]
+  except KeyError:
+    raise AttributeError(
+      "module {!r} has no attribute {!r}".format(__name__, name)) from None
+
+  value = getattr(importlib.import_module(module_name, __name__), attr)
+  globals()[name] = value
+
+  return value
+
+def __dir__():
+  return sorted(set(globals()) | set(__all__))
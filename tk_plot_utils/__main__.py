@@ -0,0 +1,54 @@
+"""Command line interface of tk_plot_utils.
+
+Usage:
+
+  python -m tk_plot_utils render specs/ --out build/ --jobs 8
+
+"""
+
+import argparse
+
+def main(argv=None):
+  """Parse command line arguments and run the given command."""
+  parser = argparse.ArgumentParser(prog="python -m tk_plot_utils")
+  subparsers = parser.add_subparsers(dest="command")
+  subparsers.required = True
+
+  render = subparsers.add_parser(
+    "render",
+    help="render figure specifications (JSON files) in a directory; "
+    "only changed figures are rendered")
+  render.add_argument(
+    "specs", help="directory containing specification files")
+  render.add_argument(
+    "--out", default="build", help="output directory (default: build)")
+  render.add_argument(
+    "--jobs", type=int, default=None,
+    help="number of worker processes (default: number of CPUs)")
+  render.add_argument(
+    "--output", choices=["html", "json"], default="html",
+    help="output format (default: html)")
+  render.add_argument(
+    "--plotlyjs", choices=["inline", "cdn", "directory"], default="inline",
+    help="how HTML files load plotly.js: embedded in each file, "
+    "from the online CDN, or from plotly.min.js written in the output "
+    "directory (default: inline)")
+  render.add_argument(
+    "--force", action="store_true", help="render all the figures")
+
+  args = parser.parse_args(argv)
+
+  if args.command == "render":
+    # imported here so that `--help` does not wait for plotly
+    from .plotly_batch import render_directory
+    rendered = render_directory(
+      args.specs, args.out, jobs=args.jobs, output=args.output,
+      include_plotlyjs=(
+        True if args.plotlyjs == "inline" else args.plotlyjs),
+      force=args.force)
+    for name in rendered:
+      print("rendered: {}".format(name))
+    print("{} figure(s) rendered".format(len(rendered)))
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,159 @@
+"""Submodule containing functions to downsample data for plotting."""
+
+import warnings
+import numpy as np
+
+def downsample_indices(x, y, max_points, method="lttb"):
+  """Return sorted indices of points kept after downsampling.
+
+  Parameters:
+
+  x: array-like
+    *x* values (numeric or datetime64) of the data.
+
+  y: array-like
+    *y* values of the data.
+
+  max_points: int
+    Maximum number of points after downsampling.
+
+  method: str
+    'lttb' (Largest-Triangle-Three-Buckets) or 'minmax'
+    (minimum and maximum in each bucket). Both keep the first
+    and last points.
+
+  """
+  n = len(y)
+
+  if n <= max_points:
+    return np.arange(n)
+
+  if method == "lttb":
+    if max_points < 3:
+      raise ValueError("max_points must be 3 or more for 'lttb'")
+    return _lttb_indices(_as_float(x), _as_float(y), max_points)
+  elif method == "minmax":
+    if max_points < 4:
+      raise ValueError("max_points must be 4 or more for 'minmax'")
+    return _minmax_indices(_as_float(y), max_points)
+  else:
+    raise ValueError("Unrecognized method: {}".format(method))
+
+def _as_float(values):
+  """Return the given data as a float array (datetime64 is converted
+  to its integer representation)."""
+  arr = np.asarray(values)
+  if arr.dtype.kind in "mM":
+    arr = arr.view("i8")
+  return arr.astype(float, copy=False)
+
+def _lttb_indices(x, y, max_points):
+  """Largest-Triangle-Three-Buckets; each bucket is processed
+  by vectorized operations."""
+  n = len(y)
+  n_buckets = max_points - 2
+
+  # buckets of inner points (the first and last points are always kept)
+  edges = np.linspace(1, n-1, n_buckets+1).astype(int)
+
+  # NaN in y is treated as 0 only for computing triangle areas
+  y = np.where(np.isnan(y), 0.0, y)
+
+  x_means = np.add.reduceat(x[1:n-1], edges[:-1]-1) / np.diff(edges)
+  y_means = np.add.reduceat(y[1:n-1], edges[:-1]-1) / np.diff(edges)
+
+  x_next = np.append(x_means[1:], x[-1])
+  y_next = np.append(y_means[1:], y[-1])
+
+  indices = np.empty(max_points, dtype=int)
+  indices[0], indices[-1] = 0, n-1
+
+  a = 0
+
+  for i in range(n_buckets):
+    start, end = edges[i], edges[i+1]
+    area = np.abs(
+      (x[a] - x_next[i]) * (y[start:end] - y[a])
+      - (x[a] - x[start:end]) * (y_next[i] - y[a]))
+    a = start + int(np.argmax(area))
+    indices[i+1] = a
+
+  return indices
+
+def _minmax_indices(y, max_points):
+  """Minimum and maximum in each bucket (fully vectorized)."""
+  n = len(y)
+  n_buckets = (max_points - 2) // 2
+
+  width = -(-(n-2) // n_buckets)  # ceiling division
+  n_buckets = -(-(n-2) // width)
+
+  padded = np.full(n_buckets*width, np.nan)
+  padded[:n-2] = y[1:n-1]
+  padded = padded.reshape(n_buckets, width)
+
+  isnan = np.isnan(padded)
+  offsets = 1 + width*np.arange(n_buckets)
+
+  # clipping is required only if a bucket contains NaN only
+  argmin = np.minimum(
+    np.where(isnan, np.inf, padded).argmin(axis=1) + offsets, n-2)
+  argmax = np.minimum(
+    np.where(isnan, -np.inf, padded).argmax(axis=1) + offsets, n-2)
+
+  return np.unique(np.concatenate(([0, n-1], argmin, argmax)))
+
+def block_reduced_levels(z, max_cells, reduce="mean"):
+  """Return a list of block-reduced two-dimensional arrays,
+  from the given array (level 0) to the coarsest one (level *k* is
+  reduced by 2**k in each dimension).
+
+  Levels are created until both dimensions of the coarsest one
+  are not greater than ``max_cells``.
+
+  Parameters:
+
+  z: array-like
+    Two-dimensional data.
+
+  max_cells: int
+    Maximum number of cells of the coarsest level in each dimension.
+
+  reduce: str
+    'mean' or 'max', which is used for reducing each 2x2 block.
+    NaN is ignored.
+
+  """
+  if reduce == "mean":
+    func = np.nanmean
+  elif reduce == "max":
+    func = np.nanmax
+  else:
+    raise ValueError("Unrecognized reduce: {}".format(reduce))
+
+  levels = [np.asarray(z)]
+
+  while max_cells < max(levels[-1].shape):
+    levels.append(_reduce_blocks(levels[-1], func))
+
+  return levels
+
+def _reduce_blocks(z, func):
+  """Reduce each 2x2 block of the given array by the given function
+  (cells outside the array are regarded as NaN)."""
+  m, n = z.shape
+  padded = np.full((m + m%2, n + n%2), np.nan)
+  padded[:m, :n] = z
+
+  with warnings.catch_warnings():
+    # all-NaN blocks are reduced to NaN without warning
+    warnings.simplefilter("ignore", RuntimeWarning)
+    return func(
+      padded.reshape(padded.shape[0]//2, 2, padded.shape[1]//2, 2),
+      axis=(1, 3))
+
+def reduced_edges(edges, factor):
+  """Return cell edges of a level reduced by the given factor
+  from the given cell edges."""
+  n = len(edges) - 1
+  return np.append(edges[:n:factor], edges[n])
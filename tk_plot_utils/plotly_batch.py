@@ -0,0 +1,370 @@
+"""Submodule for building and rendering many figures in parallel."""
+
+import gc
+import os
+import glob
+import json
+import hashlib
+import concurrent.futures as cf
+import multiprocessing.shared_memory as mpshm
+
+import numpy as np
+
+import plotly.utils as pltutils
+
+from ._version import __version__
+from .plotly_html import plotlyjs_html
+from .plotly_traces import make_scatter, make_heatmap
+from .plotly_utils import ExtendedFigure
+
+def build_figure(spec, figure_class=ExtendedFigure):
+  """Build a figure from a declarative specification, then return it.
+
+  Parameters:
+
+  spec: dict
+    Specification of the figure; the following keys are recognized.
+
+    * 'layout' : passed to constructor of ``figure_class``.
+    * 'scatter' : keyword arguments of ``make_scatter()``.
+    * 'heatmap' : keyword arguments of ``make_heatmap()``.
+    * Name of any method of ``figure_class`` starting with ``set_``
+      (e.g. 'set_title', 'set_x_title', 'set_legend') : keyword arguments
+      (dict) or positional arguments (list) of the method.
+      The methods are called in the order of the keys.
+
+  figure_class: class
+    ``ExtendedFigure`` (default) or ``ExtendedFigureWidget``.
+
+  Examples:
+
+  >>> spec = {
+  ...   "scatter": {"data": {"x": [1, 2, 3], "y": [1, 4, 9]}},
+  ...   "set_title": {"title": "Square"},
+  ...   "set_x_title": {"name": "Length", "symbol": "x", "unit": "m"},
+  ...   "set_y_range": [0, 10],
+  ... }
+  >>> fig = build_figure(spec)
+
+  """
+  fig = figure_class(layout=spec.get("layout", {}))
+
+  traces = []
+
+  if "scatter" in spec:
+    traces += make_scatter(**spec["scatter"])
+  if "heatmap" in spec:
+    traces += make_heatmap(**spec["heatmap"])
+
+  fig._set_data(traces)
+
+  for key, value in spec.items():
+    if not key.startswith("set_"):
+      continue
+    elif not hasattr(fig, key):
+      raise ValueError("Unrecognized key: {}".format(key))
+    elif isinstance(value, dict):
+      getattr(fig, key)(**value)
+    else:
+      getattr(fig, key)(*value)
+
+  return fig
+
+def render_figure(fig, output="html", include_plotlyjs=True, directory=None):
+  """Render the given figure to a string.
+
+  Parameters:
+
+  fig: ExtendedFigure or ExtendedFigureWidget
+    Figure to be rendered.
+
+  output: str
+    'html' (standalone HTML document, the same as written by
+    ``fig.write_html()``) or 'json' (JSON of the figure).
+
+  include_plotlyjs: bool or str
+    How the plotly.js library is loaded in the HTML document;
+    see ``plotlyjs_html()``.
+
+  directory: None or str
+    Directory where the HTML document is written;
+    required if ``include_plotlyjs`` is 'directory'.
+
+  """
+  if output == "json":
+    return json.dumps(
+      fig._laid_out_dict(), cls=pltutils.PlotlyJSONEncoder,
+      separators=(",", ":"))
+  elif output == "html":
+    return fig._standalone_html(include_plotlyjs, directory)
+  else:
+    raise ValueError("Unrecognized output: {}".format(output))
+
+def render_many(
+  specs, workers=None, output="html", include_plotlyjs=True,
+  directory=None, shared_nbytes=1<<20):
+  """Build and render many figures in a process pool, then return
+  a list of rendered strings in the same order as the given specs.
+
+  Parameters:
+
+  specs: list of dict
+    Specifications of figures; see ``build_figure()``.
+
+  workers: None or int
+    Number of worker processes. If None, the number of CPUs is used.
+    If 1, figures are rendered in this process.
+
+  output: str
+    'html' or 'json'; see ``render_figure()``.
+
+  include_plotlyjs: bool or str
+    See ``render_figure()``.
+
+  directory: None or str
+    See ``render_figure()``.
+
+  shared_nbytes: int
+    Arrays (``numpy.ndarray``) in the specs larger than this number
+    of bytes are passed to the workers through shared memory
+    instead of being pickled.
+
+  """
+  if output == "html" and include_plotlyjs == "directory":
+    # written once here, not by each worker process
+    plotlyjs_html(include_plotlyjs, directory)
+
+  if workers == 1:
+    return [
+      render_figure(build_figure(spec), output, include_plotlyjs, directory)
+      for spec in specs]
+
+  blocks = []
+
+  try:
+    shared_specs = [
+      _share_arrays(spec, shared_nbytes, blocks) for spec in specs]
+
+    with cf.ProcessPoolExecutor(max_workers=workers) as executor:
+      return list(executor.map(
+        _render_shared_spec, shared_specs,
+        [output]*len(specs), [include_plotlyjs]*len(specs),
+        [directory]*len(specs)))
+
+  finally:
+    for block in blocks:
+      block.close()
+      block.unlink()
+
+# Incremental Rendering ------------------------------------------------
+
+manifest_name = ".tk_plot_utils_manifest.json"
+
+def render_directory(
+  spec_dir, out_dir, jobs=None, output="html", include_plotlyjs=True,
+  force=False):
+  """Render figure specifications stored as JSON files in a directory,
+  then return a list of names of rendered figures.
+
+  Only figures of which specification or data files have changed
+  since the previous call are rendered; hashes and modification times
+  of the input files are kept in a manifest file in ``out_dir``.
+
+  In the specification (see ``build_figure()``), a data array can be
+  loaded from a file by a dictionary like ``{"$load": "data.npy"}``.
+  Paths are relative to the specification file. '.npy' files are loaded
+  by ``numpy.load()``, and other (text) files by ``numpy.loadtxt()``;
+  for text files, ``"column"`` can be specified to load a single column.
+  Comma is used as the delimiter of '.csv' files.
+
+  Parameters:
+
+  spec_dir: str
+    Directory containing specification files (``*.json``).
+
+  out_dir: str
+    Directory where rendered figures (``<name>.html`` or
+    ``<name>.json``) are written.
+
+  jobs: None or int
+    Number of worker processes; see ``render_many()``.
+
+  output: str
+    'html' or 'json'; see ``render_figure()``.
+
+  include_plotlyjs: bool or str
+    See ``render_figure()``; 'directory' means ``out_dir``.
+
+  force: bool
+    If True, all the figures are rendered.
+
+  """
+  os.makedirs(out_dir, exist_ok=True)
+
+  manifest_path = os.path.join(out_dir, manifest_name)
+  manifest = _load_manifest(manifest_path)
+
+  previous = manifest.get("figures", {}) if (
+    manifest.get("version") == __version__) else {}
+
+  entries = {}
+  stale = []
+
+  for path in sorted(glob.glob(os.path.join(spec_dir, "*.json"))):
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    out_path = os.path.join(out_dir, "{}.{}".format(name, output))
+    base_dir = os.path.dirname(path)
+
+    with open(path, "rb") as f:
+      raw = f.read()
+
+    spec = json.loads(raw.decode("utf-8"))
+    old = previous.get(name, {"data": {}})
+
+    entries[name] = {
+      "spec": hashlib.sha256(raw).hexdigest(),
+      "output": [output, include_plotlyjs],
+      "data": {
+        p: _file_state(os.path.join(base_dir, p), old["data"].get(p))
+        for p in _data_files(spec)
+      },
+    }
+
+    if (
+      force or not os.path.exists(out_path)
+      or _signature(entries[name]) != _signature(old)):
+      stale.append((name, out_path, _load_data(spec, base_dir)))
+
+  results = render_many(
+    [spec for _, _, spec in stale], workers=jobs, output=output,
+    include_plotlyjs=include_plotlyjs, directory=out_dir) if stale else []
+
+  for (_, out_path, _), result in zip(stale, results):
+    with open(out_path, "w", encoding="utf-8") as f:
+      f.write(result)
+
+  with open(manifest_path, "w") as f:
+    json.dump({"version": __version__, "figures": entries}, f, indent=2)
+
+  return [name for name, _, _ in stale]
+
+def _load_manifest(path):
+  """Load a manifest file; return an empty dictionary
+  if it does not exist or is broken."""
+  try:
+    with open(path) as f:
+      return json.load(f)
+  except (OSError, ValueError):
+    return {}
+
+def _file_state(path, old_state=None):
+  """Return modification time, size and hash of the given file.
+
+  The hash is reused from ``old_state`` if neither modification time
+  nor size has changed.
+  """
+  st = os.stat(path)
+
+  if old_state and (
+    old_state["mtime"] == st.st_mtime_ns and old_state["size"] == st.st_size):
+    return old_state
+
+  with open(path, "rb") as f:
+    digest = hashlib.sha256(f.read()).hexdigest()
+
+  return {"mtime": st.st_mtime_ns, "size": st.st_size, "sha256": digest}
+
+def _signature(entry):
+  """Return contents of a manifest entry used to detect changes."""
+  return (
+    entry.get("spec"), entry.get("output"),
+    {p: s["sha256"] for p, s in entry.get("data", {}).items()})
+
+def _data_files(obj):
+  """Return a list of data files referred in the given specification."""
+  if isinstance(obj, dict) and "$load" in obj:
+    return [obj["$load"]]
+  elif isinstance(obj, dict):
+    return [p for v in obj.values() for p in _data_files(v)]
+  elif isinstance(obj, list):
+    return [p for v in obj for p in _data_files(v)]
+  else:
+    return []
+
+def _load_data(obj, base_dir):
+  """Return a copy of the given specification
+  where references to data files are replaced with loaded arrays."""
+  if isinstance(obj, dict) and "$load" in obj:
+    path = os.path.join(base_dir, obj["$load"])
+    if path.endswith(".npy"):
+      return np.load(path)
+    return np.loadtxt(
+      path, delimiter="," if path.endswith(".csv") else None,
+      usecols=obj.get("column"))
+  elif isinstance(obj, dict):
+    return {k: _load_data(v, base_dir) for k, v in obj.items()}
+  elif isinstance(obj, list):
+    return [_load_data(v, base_dir) for v in obj]
+  else:
+    return obj
+
+# Shared Memory --------------------------------------------------------
+
+class _SharedArray:
+  """Picklable reference to an array stored in shared memory."""
+
+  def __init__(self, arr, blocks):
+    block = mpshm.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, arr.dtype, buffer=block.buf)[...] = arr
+    blocks.append(block)
+
+    self.name = block.name
+    self.shape = arr.shape
+    self.dtype = arr.dtype.str
+
+  def attach(self, blocks):
+    """Return an array (view of shared memory) in a worker process."""
+    block = mpshm.SharedMemory(name=self.name)
+    blocks.append(block)
+    return np.ndarray(self.shape, self.dtype, buffer=block.buf)
+
+def _share_arrays(obj, shared_nbytes, blocks):
+  """Return a copy of the given object where large arrays
+  are replaced with ``_SharedArray``."""
+  if isinstance(obj, dict):
+    return {
+      k: _share_arrays(v, shared_nbytes, blocks) for k, v in obj.items()}
+  elif isinstance(obj, (list, tuple)):
+    return type(obj)(_share_arrays(v, shared_nbytes, blocks) for v in obj)
+  elif (
+    isinstance(obj, np.ndarray) and obj.dtype.kind != "O"
+    and shared_nbytes < obj.nbytes):
+    return _SharedArray(obj, blocks)
+  else:
+    return obj
+
+def _attach_arrays(obj, blocks):
+  """Inverse of ``_share_arrays()`` (in a worker process)."""
+  if isinstance(obj, dict):
+    return {k: _attach_arrays(v, blocks) for k, v in obj.items()}
+  elif isinstance(obj, (list, tuple)):
+    return type(obj)(_attach_arrays(v, blocks) for v in obj)
+  elif isinstance(obj, _SharedArray):
+    return obj.attach(blocks)
+  else:
+    return obj
+
+def _render_shared_spec(shared_spec, output, include_plotlyjs, directory):
+  """Build and render a figure in a worker process."""
+  blocks = []
+
+  try:
+    return render_figure(
+      build_figure(_attach_arrays(shared_spec, blocks)),
+      output, include_plotlyjs, directory)
+  finally:
+    # release views of shared memory kept in reference cycles of figure
+    gc.collect()
+    for block in blocks:
+      block.close()
@@ -1,7 +1,13 @@
 """Submodule associated with HTML objects containing javascript functions."""
 
 import os
+import html
+import json
+import base64
 import pkgutil
+import functools as ft
+
+import numpy as np
 
 import IPython.display as ipd
 
@@ -148,6 +154,76 @@ initial_html += """\
 </script>
 """
 
+# arrange a plotted figure using the above functions
+# (`null` index means that the axis title is not written in an annotation)
+initial_html += """\
+<script>
+  function arrange_plot(plot_id, xtitle_index, ytitle_index)
+  {
+    hide_draggable_elements(plot_id);
+    remove_autoscale_button(plot_id);
+    if (xtitle_index !== null)
+    {
+      shift_subplots_xtitle(plot_id, xtitle_index);
+    }
+    if (ytitle_index !== null)
+    {
+      shift_subplots_ytitle(plot_id, ytitle_index);
+    }
+  };
+</script>
+"""
+
+# decode numeric arrays sent as base64-encoded typed arrays
+initial_html += """\
+<script>
+  function decode_typed_arrays(plot_id, payload, itr = 0)
+  {
+    let p = document.getElementById(plot_id);
+    if (!p || !p.data)
+    {
+      if (itr < 10)
+      {
+        setTimeout(decode_typed_arrays, 1000, plot_id, payload, ++itr);
+      }
+      return;
+    }
+    let types = {
+      float64: Float64Array, float32: Float32Array,
+      int32: Int32Array, int16: Int16Array, int8: Int8Array,
+      uint32: Uint32Array, uint16: Uint16Array, uint8: Uint8Array
+    };
+    payload.forEach((item) =>
+      {
+        let bytes = Uint8Array.from(atob(item.data), (c) => c.charCodeAt(0));
+        let arr = new types[item.dtype](bytes.buffer);
+        if (item.shape.length == 2)
+        {
+          let n = item.shape[1];
+          let flat = arr;
+          arr = Array.from(
+            {length: item.shape[0]}, (_, i) => flat.subarray(i*n, (i+1)*n));
+        }
+        let keys = item.path.split(".");
+        let obj = p.data[item.trace];
+        keys.slice(0, -1).forEach((key) =>
+          {
+            obj = obj[key] = obj[key] || {};
+          });
+        obj[keys[keys.length-1]] = arr;
+      });
+    window._Plotly.redraw(p);
+  };
+</script>
+"""
+
+# mark that the above functions are loaded (see `init_plotly()`)
+initial_html += """\
+<script>
+  window._tk_plot_utils_loaded = true;
+</script>
+"""
+
 # load clipboard.js (used for copying style names from reference HTML)
 style_clipboard = """\
 <style>
@@ -200,17 +276,73 @@ offline_clipboard = """\
 </script>
 """
 
+# displayed instead of the above when `init_plotly()` is called again;
+# if the page lacks the above (e.g. it was reloaded), the kernel is asked
+# to display them again and the outputs are inserted into this element
+loaded_stub_html = """\
+<div id="{0}"></div>
+<script>
+  if (!window._tk_plot_utils_loaded && !window._tk_plot_utils_loading)
+  {{
+    let element = document.getElementById("{0}");
+    if (window.Jupyter && Jupyter.notebook && Jupyter.notebook.kernel)
+    {{
+      window._tk_plot_utils_loading = true;
+      Jupyter.notebook.kernel.execute(
+        "import tk_plot_utils; tk_plot_utils.init_plotly({1}, force=True)",
+        {{
+          iopub: {{
+            output: (msg) =>
+              {{
+                let data = msg.content.data;
+                if (data && data["text/html"])
+                {{
+                  $(element).append(data["text/html"]);
+                }}
+              }}
+          }},
+          shell: {{
+            reply: () => {{ window._tk_plot_utils_loading = false; }}
+          }}
+        }},
+        {{silent: false, store_history: false}});
+    }}
+    else
+    {{
+      element.textContent =
+        "tk_plot_utils: javascript functions are not loaded in this page; "
+        + "please call init_plotly(force=True).";
+    }}
+  }}
+</script>
+"""
+
+# `connected` of the last call of `init_plotly()` in this process
+_init_state = {}
+
+@ft.lru_cache(maxsize=None)
 def _get_clipboardjs():
   """Return the contents of the minified clipboard.js library
-  as a string."""
+  as a string (loaded only once)."""
   path = os.path.join("package_data", "clipboard.min.js")
   return pkgutil.get_data("tk_plot_utils", path).decode("utf-8")
 
-def init_plotly(connected=False):
+@ft.lru_cache(maxsize=None)
+def _get_init_html(connected):
+  """Return a HTML string displayed by ``init_plotly()``."""
+  return initial_html + style_clipboard + (
+    online_clipboard
+    if connected else offline_clipboard.format(_get_clipboardjs()))
+
+def init_plotly(connected=False, force=False):
   """Initialize plotly.js and some javascript functions in the browser.
 
   Call ``plotly.offline.init_notebook_mode()`` and display a HTML object
-  defining some javascript functions.
+  defining some javascript functions. When this function is called
+  again in the same process (with the same ``connected``), only a short
+  HTML object is displayed. If the page does not have the library and
+  the functions (e.g. after reloading the page), the short HTML object
+  requests them from the kernel and loads them into the page.
 
   Parameters:
 
@@ -220,12 +352,21 @@ def init_plotly(connected=False):
     If False, the plotly.js library will be loaded locally
     from the plotly python package.
 
+  force: bool
+    If True, the plotly.js library and the javascript functions
+    are loaded even if they have been loaded already.
+
   """
+  if not force and _init_state.get("connected") == connected:
+    _init_state["count"] += 1
+    ipd.display(ipd.HTML(loaded_stub_html.format(
+      "tk-plot-utils-init-{}".format(_init_state["count"]), connected)))
+    return
+
   plt.init_notebook_mode(connected=connected)
-  ipd.display(ipd.HTML(
-    initial_html + style_clipboard + (
-      online_clipboard
-      if connected else offline_clipboard.format(_get_clipboardjs()))))
+  ipd.display(ipd.HTML(_get_init_html(connected)))
+
+  _init_state.update(connected=connected, count=0)
 
 # ----------------------------------------------------------------------
 
@@ -240,61 +381,122 @@ download_html = """\
 </button>
 """
 
-disable_html = """\
-<script>
-  if (window.Jupyter)
-  {{
-    hide_draggable_elements("{plot_id}");
-    remove_autoscale_button("{plot_id}");
-  }}
-  else
-  {{
-    window.addEventListener("load", () =>
-    {{
-      hide_draggable_elements("{plot_id}");
-      remove_autoscale_button("{plot_id}");
-    }});
-  }}
-</script>
-"""
-
-# shift x title for subplots
-xtitle_html = """\
+# arrange the plot (and shift axis titles for subplots)
+arrange_html = """\
 <script>
   if (window.Jupyter)
   {{{{
-    shift_subplots_xtitle("{{plot_id}}", {0});
+    arrange_plot("{{plot_id}}", {0}, {1});
   }}}}
   else
   {{{{
     window.addEventListener("load", () =>
     {{{{
-      shift_subplots_xtitle("{{plot_id}}", {0});
+      arrange_plot("{{plot_id}}", {0}, {1});
     }}}});
   }}}}
 </script>
 """
 
-# shift y title for subplots
-ytitle_html = """\
+# restore numeric arrays sent as typed arrays
+typed_array_html = """\
 <script>
-  if (window.Jupyter)
-  {{{{
-    shift_subplots_ytitle("{{plot_id}}", {0});
-  }}}}
-  else
+  (() =>
   {{{{
-    window.addEventListener("load", () =>
+    let payload = {0};
+    if (window.Jupyter)
     {{{{
-      shift_subplots_ytitle("{{plot_id}}", {0});
-    }}}});
-  }}}}
+      decode_typed_arrays("{{plot_id}}", payload);
+    }}}}
+    else
+    {{{{
+      window.addEventListener("load", () =>
+      {{{{
+        decode_typed_arrays("{{plot_id}}", payload);
+      }}}});
+    }}}}
+  }}}})();
 </script>
 """
 
+# paths of trace properties which can be sent as typed arrays
+typed_array_paths = [("x",), ("y",), ("z",), ("marker", "color")]
+
+# JavaScript's typed arrays do not support 64-bit integers
+typed_array_dtypes = {
+  "f": ["float32", "float64"],
+  "i": ["int8", "int16", "int32"],
+  "u": ["uint8", "uint16", "uint32"],
+}
+
+def extract_typed_arrays(data, min_size=1000):
+  """Replace numeric arrays in the given list of trace dictionaries
+  with empty lists, then return a list of dictionaries
+  containing the arrays encoded in base64.
+
+  Parameters:
+
+  data: list of dict
+    List of trace dictionaries (``data`` of a figure dictionary).
+    This list is modified in place.
+
+  min_size: int
+    Arrays smaller than this size are kept in ``data``.
+
+  """
+  payload = []
+
+  for i, trace in enumerate(data):
+    for path in typed_array_paths:
+
+      parent = trace
+      for key in path[:-1]:
+        parent = parent.get(key, {})
+
+      if not isinstance(parent, dict) or path[-1] not in parent:
+        continue
+
+      arr = _as_typed_array(parent[path[-1]])
+
+      if arr is None or arr.size < min_size:
+        continue
+
+      payload.append({
+        "trace": i,
+        "path": ".".join(path),
+        "dtype": arr.dtype.name,
+        "shape": list(arr.shape),
+        "data": base64.b64encode(arr.tobytes()).decode("ascii"),
+      })
+
+      parent[path[-1]] = []
+
+  return payload
+
+def _as_typed_array(values):
+  """Return a little-endian numeric array which can be converted
+  to a JavaScript's typed array, or None if impossible."""
+  try:
+    arr = np.asarray(values)
+  except ValueError:  # ragged
+    return None
+
+  if arr.dtype.kind not in typed_array_dtypes or 2 < arr.ndim:
+    return None
+
+  if arr.dtype.name not in typed_array_dtypes[arr.dtype.kind]:
+    if arr.dtype.kind != "f" and arr.size and (
+      np.iinfo(np.int32).min <= arr.min() and
+      arr.max() <= np.iinfo(np.int32).max):
+      arr = arr.astype(np.int32)
+    else:
+      arr = arr.astype(np.float64)
+
+  return np.ascontiguousarray(arr, dtype=arr.dtype.newbyteorder("<"))
+
 get_image_download_script_original = pltoff.get_image_download_script
 
-def override(xtitle_index=None, ytitle_index=None):
+def override(xtitle_index=None, ytitle_index=None, typed_arrays=None):
   """Override ``plotly.offline.offline.get_image_download_script()``
   every time before plotting.
 
@@ -314,14 +516,13 @@ def override(xtitle_index=None, ytitle_index=None):
     the annotations, its index should be specified by this parameter
     and passed to a javascript function.
 
-  """
+  typed_arrays: None or list of dict
+    Arrays encoded by ``extract_typed_arrays()``, which are decoded
+    and restored to the plot by a javascript function.
 
-  inject_html = download_html + disable_html
+  """
 
-  if xtitle_index is not None:
-    inject_html += xtitle_html.format(xtitle_index)
-  if ytitle_index is not None:
-    inject_html += ytitle_html.format(ytitle_index)
+  inject_html = injected_html(xtitle_index, ytitle_index, typed_arrays)
 
   def get_image_download_script_override(caller):
     if caller == "plot":
@@ -332,3 +533,95 @@ def override(xtitle_index=None, ytitle_index=None):
     return inject_html
 
   pltoff.get_image_download_script = get_image_download_script_override
+
+def injected_html(xtitle_index=None, ytitle_index=None, typed_arrays=None):
+  """Return a HTML string injected after a plot; see ``override()``
+  for parameters.
+
+  The returned string should be formatted with ``plot_id``, ``format``,
+  ``height``, ``width`` and ``filename``.
+  """
+  inject_html = download_html + arrange_html.format(
+    "null" if xtitle_index is None else xtitle_index,
+    "null" if ytitle_index is None else ytitle_index)
+
+  if typed_arrays:
+    # braces in JSON must be escaped for `str.format()` applied by Plotly
+    inject_html += typed_array_html.format(
+      json.dumps(typed_arrays).replace("{", "{{").replace("}", "}}"))
+
+  return inject_html
+
+# ----------------------------------------------------------------------
+
+# the same version as the library bundled with plotly
+# ('plotly-latest' is no longer updated)
+plotly_cdn_url = "https://cdn.plot.ly/plotly-{}.min.js".format(
+  plt.get_plotlyjs_version())
+
+# file name of plotly.js written by `plotlyjs_html(include_plotlyjs="directory")`
+plotlyjs_filename = "plotly.min.js"
+
+# standalone HTML document containing a plot
+standalone_html = """\
+<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="utf-8"/>
+</head>
+<body>
+{plotlyjs}
+<script>
+  window._Plotly = window._Plotly || window.Plotly;
+</script>
+{initial_html}
+<div id="{plot_id}" style="height: {height}px; width: {width}px;"></div>
+<script>
+  (() =>
+  {{
+    let figure = {figure};
+    window._Plotly.newPlot(
+      "{plot_id}", figure.data, figure.layout, {{showLink: false}});
+  }})();
+</script>
+{inject_html}
+</body>
+</html>
+"""
+
+def plotlyjs_html(include_plotlyjs=True, directory=None):
+  """Return a HTML script element loading the plotly.js library.
+
+  Parameters:
+
+  include_plotlyjs: bool or str
+    If True, the library is embedded. If False, the library is not
+    loaded (it must be loaded by the page elsewhere). If 'cdn',
+    the library of the bundled version is loaded from the online CDN.
+    If 'directory', the library is loaded from
+    'plotly.min.js' in ``directory``, where the file is written
+    if it does not exist (so one file is shared by many HTML files).
+    Any other string is used as URL (or relative path) of the library.
+
+  directory: None or str
+    Directory of the HTML file; required for 'directory'.
+
+  """
+  if include_plotlyjs is True:
+    return "<script>{}</script>".format(plt.get_plotlyjs())
+  elif include_plotlyjs is False:
+    return ""
+  elif include_plotlyjs == "cdn":
+    return '<script src="{}"></script>'.format(plotly_cdn_url)
+  elif include_plotlyjs == "directory":
+    path = os.path.join(directory, plotlyjs_filename)
+    if not os.path.exists(path):
+      with open(path, "w", encoding="utf-8") as f:
+        f.write(plt.get_plotlyjs())
+    return '<script src="{}"></script>'.format(plotlyjs_filename)
+  elif isinstance(include_plotlyjs, str):
+    return '<script src="{}"></script>'.format(
+      html.escape(include_plotlyjs))
+  else:
+    raise ValueError(
+      "Unrecognized include_plotlyjs: {}".format(include_plotlyjs))
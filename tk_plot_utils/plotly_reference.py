@@ -1,5 +1,7 @@
 """Submodule containing functions to show Plotly's style reference."""
 
+import functools as ft
+
 import IPython.display as ipd
 
 from plotly.validators.scatter.marker._symbol import SymbolValidator
@@ -29,11 +31,7 @@ def ref_scatter_marker_symbol(start="", end=""):
     Show strings only ending by this string.
 
   """
-  ipd.display(ipd.HTML(html_template.format(
-    "".join(
-      item_template.format(s)
-      for s in SymbolValidator().values
-      if isinstance(s, str) and s.startswith(start) and s.endswith(end)))))
+  ipd.display(ipd.HTML(_items_html(scatter_marker_symbols(start, end))))
 
 def ref_scatter_line_dash():
   """Show a list of strings valid for values of ``Scatter.line.dash``.
@@ -41,7 +39,73 @@ def ref_scatter_line_dash():
   Strings can be copied to clipboard by clicking.
 
   """
-  ipd.display(ipd.HTML(html_template.format(
-    "".join(
-      item_template.format(s)
-      for s in DashValidator().values if isinstance(s, str)))))
\ No newline at end of file
+  ipd.display(ipd.HTML(_items_html(_dash_values())))
+
+def scatter_marker_symbols(start="", end=""):
+  """Return a tuple of strings valid for values of
+  ``Scatter.marker.symbol``.
+
+  Parameters:
+
+  start: str
+    Return strings only starting by this string.
+
+  end: str
+    Return strings only ending by this string.
+
+  Examples:
+
+  >>> scatter_marker_symbols("star", "-dot")
+  ('star-dot', 'star-open-dot', ...)
+  >>> "circle-open" in scatter_marker_symbols()
+  True
+
+  """
+  prefixes, suffixes = _symbol_indexes()
+
+  if not end:
+    return prefixes.get(start, ())
+
+  matched = suffixes.get(end, frozenset())
+  return tuple(s for s in prefixes.get(start, ()) if s in matched)
+
+def scatter_line_dashes():
+  """Return a tuple of named strings valid for values of
+  ``Scatter.line.dash`` (a dash length list like '5px,10px'
+  is also valid, but not included).
+  """
+  return tuple(s for s in _dash_values() if not s.startswith("/"))
+
+@ft.lru_cache(maxsize=None)
+def _symbol_values():
+  """Return a tuple of strings valid for ``Scatter.marker.symbol``
+  (created only once)."""
+  return tuple(s for s in SymbolValidator().values if isinstance(s, str))
+
+@ft.lru_cache(maxsize=None)
+def _dash_values():
+  """Return a tuple of strings valid for ``Scatter.line.dash``
+  (created only once)."""
+  return tuple(s for s in DashValidator().values if isinstance(s, str))
+
+@ft.lru_cache(maxsize=None)
+def _symbol_indexes():
+  """Return dictionaries from every prefix (suffix) to the symbols
+  starting (ending) with it."""
+  prefixes = {}
+  suffixes = {}
+
+  for s in _symbol_values():
+    for i in range(len(s)+1):
+      prefixes.setdefault(s[:i], []).append(s)
+      suffixes.setdefault(s[i:], set()).add(s)
+
+  return (
+    {k: tuple(v) for k, v in prefixes.items()},
+    {k: frozenset(v) for k, v in suffixes.items()})
+
+@ft.lru_cache(maxsize=256)
+def _items_html(values):
+  """Return a HTML list of the given strings."""
+  return html_template.format(
+    "".join(item_template.format(s) for s in values))
@@ -0,0 +1,163 @@
+"""Submodule for writing many figures to a single HTML report."""
+
+import os
+import html
+
+from .plotly_html import initial_html, download_html, plotlyjs_html
+from .plotly_batch import render_figure, render_many
+from .plotly_utils import ExtendedFigure
+from .utility_functions import merged_dict
+
+report_template = """\
+<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="utf-8"/>
+  <title>{title}</title>
+</head>
+<body>
+{plotlyjs}
+<script>
+  window._Plotly = window._Plotly || window.Plotly;
+</script>
+{initial_html}
+{body}
+{lazy_plot_html}
+</body>
+</html>
+"""
+
+# each figure is stored as JSON in a script element (not parsed until
+# the figure is plotted)
+figure_html = """\
+<div class="tk-report-figure">
+{heading}
+{download}
+<div id="{plot_id}" class="tk-lazy-plot" style="height: {height}px; width: {width};"></div>
+<script type="application/json" id="{plot_id}-json">{json}</script>
+</div>
+"""
+
+# plot figures coming into the viewport, and purge those going out
+lazy_plot_html = """\
+<script>
+  (() =>
+  {{
+    function plot(p)
+    {{
+      let fig = JSON.parse(
+        document.getElementById(p.id + "-json").textContent);
+      p.dataset.plotted = "true";
+      window._Plotly.newPlot(
+        p, fig.data, fig.layout, {{showLink: false}}).then(() =>
+        {{
+          let names = (fig.layout.annotations || []).map((a) => a.name);
+          let index = (name) =>
+            names.includes(name) ? names.indexOf(name) : null;
+          arrange_plot(p.id, index("x-title"), index("y-title"));
+        }});
+    }}
+    let observer = new IntersectionObserver((entries) =>
+      {{
+        entries.forEach((entry) =>
+          {{
+            let p = entry.target;
+            if (entry.isIntersecting && !p.dataset.plotted)
+            {{
+              plot(p);
+            }}
+            else if (!entry.isIntersecting && p.dataset.plotted)
+            {{
+              window._Plotly.purge(p);
+              delete p.dataset.plotted;
+            }}
+          }});
+      }},
+      {{rootMargin: "{margin}"}});
+    document.querySelectorAll("div.tk-lazy-plot").forEach(
+      (p) => observer.observe(p));
+  }})();
+</script>
+"""
+
+def write_report(
+  path, figures, headings=None, title="Report", include_plotlyjs=True,
+  workers=1, margin="100% 0px"):
+  """Write many figures to a single HTML file, where the plotly.js
+  library and javascript functions are included only once, and each
+  figure is plotted only while it is in (or near) the viewport.
+
+  Parameters:
+
+  path: str
+    Path to the HTML file.
+
+  figures: list
+    List of ``ExtendedFigure``, ``ExtendedFigureWidget``
+    or specifications of figures (dict; see ``build_figure()``).
+
+  headings: None or list of str
+    Headings written above the figures.
+
+  title: str
+    Title of the HTML document.
+
+  include_plotlyjs: bool or str
+    See ``plotlyjs_html()``.
+
+  workers: None or int
+    Number of worker processes used for the specifications;
+    see ``render_many()``.
+
+  margin: str
+    Margin around the viewport (``rootMargin`` of IntersectionObserver)
+    within which the figures are plotted; figures out of the margin are
+    purged to save memory of the browser.
+
+  """
+  specs = [f for f in figures if isinstance(f, dict)]
+  rendered = iter(render_many(specs, workers=workers, output="json")) \
+    if specs else iter([])
+
+  body = []
+
+  for i, fig in enumerate(figures):
+
+    fig_json = next(rendered) if isinstance(fig, dict) \
+      else render_figure(fig, output="json")
+
+    # closing tags in strings must be escaped inside a script element
+    fig_json = fig_json.replace("</", "<\\/")
+
+    height, width = _figure_size(fig)
+    plot_id = "tk-plot-{}".format(i)
+
+    body.append(figure_html.format(
+      plot_id=plot_id,
+      heading="<h2>{}</h2>".format(html.escape(headings[i])) \
+        if headings else "",
+      download=download_html.format(
+        plot_id=plot_id, format="svg",
+        height=height or 450, width=width or 700, filename=plot_id),
+      height=height or 450,
+      width="{}px".format(width) if width else "100%",
+      json=fig_json))
+
+  with open(path, "w", encoding="utf-8") as f:
+    f.write(report_template.format(
+      title=html.escape(title),
+      plotlyjs=plotlyjs_html(
+        include_plotlyjs, os.path.dirname(os.path.abspath(path))),
+      initial_html=initial_html,
+      body="".join(body),
+      lazy_plot_html=lazy_plot_html.format(margin=margin)))
+
+def _figure_size(fig):
+  """Return height and width (None if not set) of the given figure
+  or specification of a figure (see ``build_figure()``)."""
+  if isinstance(fig, dict):
+    layout = merged_dict(
+      ExtendedFigure.default_layout, fig.get("layout", {}))
+    return layout.get("height"), layout.get("width")
+
+  return fig.layout.height, fig.layout.width
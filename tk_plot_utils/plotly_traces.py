@@ -3,11 +3,22 @@
 import numpy as np
 
 from .plotly_html import  pltgo
+from .utility_functions import grid_shape, RingBuffer
+from .downsampling import (
+  downsample_indices, block_reduced_levels, reduced_edges)
 
-def make_scatter(data):
+# keys of Scatter's properties having a value for each point
+_per_point_keys = ["y", "text", "hovertext", "customdata", "ids"]
+
+def make_scatter(
+  data, max_points=None, downsample="lttb", webgl_threshold=100000,
+  ring_buffer=None):
   """Create a list of ``plotly.graph_objs.Scatter`` instance(s),
   then return it.
 
+  Data having many points is plotted by ``plotly.graph_objs.Scattergl``
+  (WebGL) instead of ``plotly.graph_objs.Scatter`` (SVG).
+
   Parameters:
 
   data: dict or list/tuple of dict
@@ -21,15 +32,148 @@ def make_scatter(data):
     >>> import tk_plot_utils as tk
     >>> help(tk.go.Scatter)
 
+  max_points: None or int
+    If specified, data having more points than this number is
+    downsampled before creating the instance. The full resolution data
+    is kept by ``tk.plotly`` (if the instance is passed to its
+    ``show()`` or ``subplots()``) to recompute the downsampling
+    for a zoomed range; see ``tk.plotly.resample()``.
+
+  downsample: str
+    Method of downsampling: 'lttb' (Largest-Triangle-Three-Buckets)
+    or 'minmax' (minimum and maximum in each bucket).
+
+  webgl_threshold: None or int
+    Data having more points (after downsampling) than this number
+    is plotted by ``plotly.graph_objs.Scattergl``.
+    If None, ``plotly.graph_objs.Scatter`` is always used.
+
+  ring_buffer: None or int
+    If specified, *x* and *y* values are kept in ring buffers which
+    keep only the newest points up to this number, and points appended
+    by ``tk.plotly.extend_trace()`` are written into the buffers without
+    reallocation (only the kept points are sent to the plot); this is
+    useful for a long-running live plot. Ranges of axes of the instance
+    follow the kept points. Per-point values other than *x* and *y*
+    cannot be used, and this cannot be used with ``max_points``.
+
   """
   if isinstance(data, dict):
     data = [data]
   elif not isinstance(data, (list, tuple)):
     raise TypeError("Invalid type of data: {}".format(type(data)))
 
-  return [pltgo.Scatter(d) for d in data]
+  if ring_buffer is not None and max_points is not None:
+    raise ValueError("max_points cannot be used with ring_buffer")
+
+  traces = []
+
+  for d in data:
+
+    ring_buffers = None
+
+    if ring_buffer is not None:
+      ring_buffers = _make_ring_buffers(d, ring_buffer)
+      d = {
+        **d,
+        "x": ring_buffers["x"].view(),
+        "y": ring_buffers["y"].view(),
+      }
+
+    n = _num_points(d)
+    full_resolution = None
+
+    if max_points is not None and max_points < n:
+
+      full_resolution = {
+        "arrays": {
+          "x": np.asarray(d["x"]) if "x" in d else np.arange(n),
+          **{
+            k: np.asarray(d[k]) for k in _per_point_keys
+            if k in d and not isinstance(d[k], str) and len(d[k]) == n
+          },
+        },
+        "max_points": max_points,
+        "method": downsample,
+      }
+
+      d = {**d, **downsampled_data(full_resolution)}
+      n = _num_points(d)
+
+    if webgl_threshold is not None and webgl_threshold < n:
+      trace = pltgo.Scattergl(d)
+    else:
+      trace = pltgo.Scatter(d)
+
+    if full_resolution is not None:
+      trace._full_resolution = full_resolution
+    if ring_buffers is not None:
+      trace._ring_buffers = ring_buffers
+
+    traces.append(trace)
+
+  return traces
+
+def _make_ring_buffers(d, capacity):
+  """Return a dictionary of ring buffers of *x* and *y* values
+  initialized by the given data for Scatter."""
+  for k in _per_point_keys[1:]:
+    if k in d and not isinstance(d[k], str):
+      raise ValueError("{} cannot be used with ring_buffer".format(k))
+
+  y = np.asarray(d["y"] if d.get("y") is not None else [], dtype=float)
+  x = np.asarray(d["x"]) if d.get("x") is not None \
+    else np.arange(len(y), dtype=float)
+
+  # integers are stored as floats, which are sent to FigureWidget faster
+  ring_buffers = {
+    "x": RingBuffer(capacity, x.dtype if x.dtype.kind == "M" else float),
+    "y": RingBuffer(capacity, float),
+    # whether *x* values are indices of points or not
+    "implicit_x": d.get("x") is None,
+  }
+
+  ring_buffers["x"].push(x)
+  ring_buffers["y"].push(y)
+
+  return ring_buffers
+
+def _num_points(d):
+  """Return the number of points in the given data for Scatter."""
+  return 0 if d.get("y") is None else len(d["y"])
+
+def downsampled_data(full_resolution, x_range=None):
+  """Return a dictionary of downsampled *x*, *y* and other per-point
+  values.
+
+  Parameters:
+
+  full_resolution: dict
+    Dictionary containing the full resolution arrays ('arrays',
+    a dictionary of which keys are at least 'x' and 'y'),
+    and parameters of downsampling ('max_points' and 'method').
+
+  x_range: None or list/tuple
+    If specified, only points in this range (and their neighbors
+    just outside the range) are downsampled.
+
+  """
+  arrays = full_resolution["arrays"]
+
+  if x_range is not None:
+    x = arrays["x"]
+    inside = np.flatnonzero((x_range[0] <= x) & (x <= x_range[1]))
+    if inside.size:
+      window = slice(max(inside[0]-1, 0), min(inside[-1]+2, len(x)))
+      arrays = {k: v[window] for k, v in arrays.items()}
+
+  indices = downsample_indices(
+    arrays["x"], arrays["y"],
+    full_resolution["max_points"], full_resolution["method"])
+
+  return {k: v[indices] for k, v in arrays.items()}
 
-def make_heatmap(data):
+def make_heatmap(data, max_cells=None, reduce="mean"):
   """Create a list of ``plotly.graph_objs.Heatmap`` instance(s),
   then return it.
 
@@ -46,6 +190,19 @@ def make_heatmap(data):
     >>> import tk_plot_utils as tk
     >>> help(tk.go.Heatmap)
 
+  max_cells: None or int
+    If specified, data having more cells than this number in *x* or
+    *y* direction is shown using a multi-resolution pyramid:
+    block-reduced levels of ``z`` are precomputed, and the coarsest
+    level having at most this number of cells in each direction is
+    shown. The pyramid is kept by ``tk.plotly`` (if the instance is
+    passed to its ``show()`` or ``subplots()``) to show finer levels
+    for a zoomed range; see ``tk.plotly.resample()``.
+    Values of ``x`` and ``y`` must be increasing.
+
+  reduce: str
+    Function reducing 2x2 blocks for the pyramid: 'mean' or 'max'.
+
   """
   if isinstance(data, dict):
     data = [data]
@@ -57,7 +214,7 @@ def make_heatmap(data):
     if "transpose" not in d:
       d["transpose"] = True
 
-    nx, ny = np.array(d["z"]).shape
+    nx, ny = grid_shape(d["z"])
 
     if not d["transpose"]:
       nx, ny = ny, nx
@@ -89,4 +246,103 @@ def make_heatmap(data):
     elif not ("x" in d and "y" in d):
       raise RuntimeError("Either 'origin' or 'x' and 'y' are required")
 
-  return [pltgo.Heatmap(d) for d in data]
\ No newline at end of file
+  traces = []
+
+  for d in data:
+
+    nx, ny = grid_shape(d["z"])
+
+    if not d["transpose"]:
+      nx, ny = ny, nx
+
+    if max_cells is None or max(nx, ny) <= max_cells:
+      traces.append(pltgo.Heatmap(d))
+      continue
+
+    pyramid = {
+      "levels": block_reduced_levels(d["z"], max_cells, reduce),
+      "x": _cell_edges(d["x"], nx),
+      "y": _cell_edges(d["y"], ny),
+      "transpose": d["transpose"],
+      "max_cells": max_cells,
+    }
+
+    trace = pltgo.Heatmap({**d, **pyramid_data(pyramid)})
+    trace._full_resolution = pyramid
+    traces.append(trace)
+
+  return traces
+
+def pyramid_data(pyramid, x_range=None, y_range=None):
+  """Return a dictionary of *z*, *x* and *y* values
+  taken from a level of the given multi-resolution pyramid.
+
+  The coarsest level having at most ``max_cells`` cells in the given
+  range is selected, and only its cells in the range are returned.
+
+  Parameters:
+
+  pyramid: dict
+    Dictionary containing block-reduced levels of *z* ('levels'),
+    cell edges of the level 0 ('x' and 'y'), 'transpose' of
+    the heatmap and 'max_cells'.
+
+  x_range: None or list/tuple
+    Range of *x* axis; if None, the entire range is used.
+
+  y_range: None or list/tuple
+    Range of *y* axis; if None, the entire range is used.
+
+  """
+  windows = [
+    _cell_window(pyramid[direc], r)
+    for direc, r in zip("xy", (x_range, y_range))]
+
+  n_cells = max(w.stop-w.start for w in windows)
+  level = 0
+
+  while (
+    level+1 < len(pyramid["levels"]) and
+    pyramid["max_cells"] < -(-n_cells // 2**level)):
+    level += 1
+
+  factor = 2**level
+
+  # window in cells of the selected level
+  windows = [
+    slice(w.start//factor, -(-w.stop//factor)) for w in windows]
+
+  z = pyramid["levels"][level]
+  z = z[windows[0], windows[1]] if pyramid["transpose"] else (
+    z[windows[1], windows[0]])
+
+  return {
+    "z": z,
+    **{
+      direc: reduced_edges(pyramid[direc], factor)[w.start:w.stop+1]
+      for direc, w in zip("xy", windows)
+    },
+  }
+
+def _cell_edges(v, n):
+  """Return edges of the given number of cells
+  from the given edges or centers of the cells."""
+  v = np.asarray(v, dtype=float)
+
+  if len(v) == n+1:
+    return v
+
+  half = 0.5 * np.diff(v)
+
+  return np.concatenate(
+    ([v[0]-half[0]], v[:-1]+half, [v[-1]+half[-1]]))
+
+def _cell_window(edges, axis_range):
+  """Return a slice of cells overlapping the given range."""
+  if axis_range is None:
+    return slice(0, len(edges)-1)
+
+  start = max(np.searchsorted(edges, axis_range[0], side="right")-1, 0)
+  stop = min(np.searchsorted(edges, axis_range[1], side="left"), len(edges)-1)
+
+  return slice(start, max(stop, start+1))
\ No newline at end of file
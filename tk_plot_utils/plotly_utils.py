@@ -1,35 +1,44 @@
-"""Submodule for a class inheriting ``plotly.graph_objs.FigureWidget``."""
+"""Submodule for classes inheriting ``plotly.graph_objs.FigureWidget``
+and ``plotly.graph_objs.Figure``."""
 
+import os
 import re
+import json
+import time
+import asyncio
+import threading
 import copy as cp
 import numpy as np
 import itertools as it
+import contextlib as cl
 import collections as co
 
 from datetime import datetime
 
+from plotly import io as pio
 from plotly import tools
+from plotly import utils as pltutils
 
-from .plotly_html import  plt, pltgo, override
-from .utility_functions import merged_dict
+from .plotly_html import  plt, pltgo, override, extract_typed_arrays
+from .plotly_html import (
+  initial_html, injected_html, standalone_html, plotlyjs_html)
+from .plotly_traces import downsampled_data, pyramid_data
+from .utility_functions import merged_dict, array_extent, grid_shape
 
 #=======================================================================
 
-class ExtendedFigureWidget(pltgo.FigureWidget):
-  """Inheriting ``plotly.graph_objs.FigureWidget``.
+# pattern of a name of single axis (e.g. 'x', 'y2')
+_axis_name_pattern = re.compile(r"[xy]\d*$")
 
-  Original FigureWidget's functionalities *plus* the following features.
-
-  * Show myself (using ``plotly.offline.iplot()``).
-  * Make subplots (using ``plotly.tools.make_subplots()``).
-  * Manage legend and titles.
-  * Manage axis layout.
+class _ExtendedFigureBase:
+  """Common implementation of ``ExtendedFigureWidget``
+  and ``ExtendedFigure``.
 
   .. note::
     Static Members:
 
     default_layout: dict
-      ExtendedFigureWidget is initialized with this layout.
+      Instances are initialized with this layout.
 
     unitalicized: list of str
       Strings in this list will not be italicized in a symbol of axis title.
@@ -77,8 +86,11 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
     self._init_layout()
     self._init_axis()
 
-    # required to delete dummy data used for showing mirror/minor axis
-    self._dummy_uids = []
+    # how to place dummy data; see `set_dummy_trace_mode()`
+    self._dummy_mode = "product"
+
+    # mirror/minor axes already referenced by dummy data
+    self._dummy_axes = set()
 
     # whether this instance has subplots or not
     self._has_subplots = False
@@ -86,7 +98,19 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
     # required to align axis range in subplots
     self._range_alignment = {}
 
-  def show(self, data=None, **kwargs):
+    # extents of trace data; keys are 'uid' of traces
+    self._extent_cache = {}
+
+    # full resolution data of downsampled traces; keys are 'uid' of traces
+    self._full_resolution = {}
+
+    # ring buffers of live traces; keys are 'uid' of traces
+    self._ring_buffers = {}
+
+    # depth of nested `batch_layout()` blocks
+    self._layout_batch_depth = 0
+
+  def show(self, data=None, transport="json", **kwargs):
     """Show a plot of data contained in this instance
     using ``plotly.offline.iplot()``.
 
@@ -98,6 +122,13 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
       before calling ``plotly.offline.iplot()``.
       If None, there is no addition of data.
 
+    transport: str
+      'json' or 'binary'. If 'binary', large numeric arrays ('x', 'y',
+      'z' and 'marker.color') are sent as base64-encoded typed arrays
+      instead of JSON text, and decoded in the browser
+      (``init_plotly()`` is required to define the decoder).
+      This makes the output much smaller for large data.
+
     kwargs:
       Passed to ``plotly.offline.iplot()``.
 
@@ -110,10 +141,11 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
     if isinstance(data, (tuple, list)):
       self._set_data(data)
 
-    self._layout_all()
+    figure = self._laid_out_dict()
 
     auto_kwargs = {
       "show_link": False,
+      "validate": False,
       "image": "svg",
       "image_width": self.layout.width,
       "image_height": self.layout.height,
@@ -122,29 +154,111 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
 
     auto_kwargs.update(kwargs)
 
-    dct = {
-      a["name"]: i for i, a in enumerate(self.layout.annotations)
-      if isinstance(a.name, str) and a.name.endswith("-title")
-    } if "annotations" in self.layout else {}
+    dct = self._title_indices()
+
+    if transport == "binary":
+      typed_arrays = extract_typed_arrays(figure["data"])
+    elif transport == "json":
+      typed_arrays = None
+    else:
+      raise ValueError("Unrecognized transport: {}".format(transport))
 
-    override(dct.get("x-title"), dct.get("y-title"))
+    override(dct.get("x-title"), dct.get("y-title"), typed_arrays)
 
-    plt.iplot(self, **auto_kwargs)
+    plt.iplot(figure, **auto_kwargs)
 
-    self._clear_dummy_traces()
+  def write_html(
+    self, path, include_plotlyjs="directory", transport="json",
+    filename=None):
+    """Write a standalone HTML file containing a plot of data
+    contained in this instance.
+
+    The same scripts as ``show()`` (a button to download an image,
+    hiding draggable elements and shifting axis titles) are included.
+
+    Parameters:
+
+    path: str
+      Path to the HTML file.
+
+    include_plotlyjs: bool or str
+      True (embedded), False (not loaded), 'cdn', 'directory' (default;
+      'plotly.min.js' in the same directory as the HTML file, which is
+      shared with other HTML files) or URL (or relative path)
+      of the plotly.js library; see ``plotlyjs_html()``.
+
+    transport: str
+      'json' or 'binary'; see ``show()``.
+
+    filename: None or str
+      File name of downloaded images. If None, it is created from
+      the current time.
+
+    """
+    document = self._standalone_html(
+      include_plotlyjs, os.path.dirname(os.path.abspath(path)),
+      transport, filename)
+
+    with open(path, "w", encoding="utf-8") as f:
+      f.write(document)
+
+  def _standalone_html(
+    self, include_plotlyjs=True, directory=None, transport="json",
+    filename=None):
+    """Return a standalone HTML document containing a plot of data
+    contained in this instance; see ``self.write_html()``
+    (``directory`` is passed to ``plotlyjs_html()``)."""
+    figure = self._laid_out_dict()
+
+    if transport == "binary":
+      typed_arrays = extract_typed_arrays(figure["data"])
+    elif transport == "json":
+      typed_arrays = None
+    else:
+      raise ValueError("Unrecognized transport: {}".format(transport))
+
+    dct = self._title_indices()
+
+    plot_id = "tk-plot-" + datetime.now().strftime("%Y%m%d%H%M%S%f")
+
+    inject_html = injected_html(
+      dct.get("x-title"), dct.get("y-title"), typed_arrays).format(
+        plot_id=plot_id, format="svg",
+        height=self.layout.height, width=self.layout.width,
+        filename=filename or (
+          "plot-" + datetime.now().strftime("%Y%m%d-%H%M%S")))
+
+    # closing tags in strings must be escaped inside a script element
+    figure_json = json.dumps(
+      figure, cls=pltutils.PlotlyJSONEncoder,
+      separators=(",", ":")).replace("</", "<\\/")
+
+    return standalone_html.format(
+      plotlyjs=plotlyjs_html(include_plotlyjs, directory),
+      initial_html=initial_html,
+      plot_id=plot_id,
+      height=self.layout.height,
+      width=self.layout.width,
+      figure=figure_json,
+      inject_html=inject_html)
 
   def subplots(
     self, trace_array, share="", align={},
     xspace_factor=1.0, yspace_factor=1.0, **kwargs):
-    """Make subplots from an array of trace instances
-    using ``plotly.tools.make_subplots()``.
+    """Make subplots from an array of trace instances.
+    Domains of subplots are the same as those given by
+    ``plotly.tools.make_subplots()``, but computed directly
+    (without validation by plotly) unless *kwargs* contains 'insets',
+    'start_cell', a 3D cell or subplot titles of shared axes.
 
     Parameters:
 
     trace_array: list
       Two-dimensional list containing trace instances.
       Shape and arrangement of this list must correspond to
-      those of subplots.
+      those of subplots. The trace instances are copied (and validated)
+      by ``self.add_traces()``, so changing them afterwards does not
+      affect this instance.
 
     share: str
       Specify shared axis. If 'x', traces in the same column share
@@ -278,8 +392,299 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
     if font:
       self.layout.title.update(font=font)
 
+  def set_dummy_trace_mode(self, mode="product"):
+    """Set how invisible dummy traces, which are required to show
+    mirror and minor ticks, are placed.
+
+    Parameters:
+
+    mode: str
+      One of 'product' or 'shared'.
+
+      * 'product' (default) places a dummy trace for every combination
+        of mirror (minor) axes of *x* and *y* directions.
+      * 'shared' places the minimum number of dummy traces
+        so that every mirror/minor axis is referenced by one of them.
+        The number of dummy traces grows linearly with the number of
+        axes, not quadratically as in 'product'. plotly.js resolves
+        the same attributes (range, ticks, domain, etc.) for every axis
+        as in 'product'; only the subplot in which a mirror/minor axis
+        is drawn (and which handles dragging it) may differ
+        in subplots sharing an axis.
+
+    """
+    if mode not in ("product", "shared"):
+      raise ValueError("Unrecognized mode: {}".format(mode))
+
+    self._dummy_mode = mode
+
+  def resample(self, axis_ranges={}):
+    """Recompute downsampled traces using their full resolution data.
+
+    Targets are traces created by ``make_scatter()`` with
+    ``max_points`` and by ``make_heatmap()`` with ``max_cells``.
+
+    Parameters:
+
+    axis_ranges: dict
+      Dictionary of which keys are names of axes and values are
+      ranges. Only data in the range is downsampled (or the finer level
+      of the pyramid is shown), so that a zoomed view shows more details.
+      For axes not in this dictionary, their current ranges are used
+      (e.g. updated by zooming in a displayed FigureWidget).
+
+    """
+    def get_range(axis):
+      if axis in axis_ranges:
+        return axis_ranges[axis]
+      elif axis in self._axes:
+        return self._axes[axis].layout.get("range")
+
+    with self.batch_update():
+      for trace in self.data:
+        if trace.uid not in self._full_resolution:
+          continue
+
+        full_resolution = self._full_resolution[trace.uid]
+        xaxis = trace.xaxis if trace.xaxis else "x"
+        yaxis = trace.yaxis if trace.yaxis else "y"
+
+        if isinstance(trace, pltgo.Heatmap):
+          trace.update(pyramid_data(
+            full_resolution, get_range(xaxis), get_range(yaxis)))
+        else:
+          trace.update(downsampled_data(full_resolution, get_range(xaxis)))
+
+  def auto_resample(self):
+    """Call ``self.resample()`` whenever a range of main axes is changed
+    (e.g. by zooming in a displayed FigureWidget)."""
+    paths = [
+      "{}axis{}.range".format(axis[0], axis[1:])
+      for axis in self._axes if axis[1:] == "" or int(axis[1:]) < 100]
+
+    self.layout.on_change(lambda *args: self.resample(), *paths)
+
+  def extend_trace(self, trace, x=None, y=None, extend_range=True):
+    """Append points to the given *Scatter* (or *Scattergl*) trace.
+
+    Cached extents of the trace and ranges of its axes are updated
+    using only the appended points. Note that data of the trace are
+    still concatenated, validated and sent to a displayed FigureWidget
+    as a whole, so each call takes time proportional to the total number
+    of points (use ``ring_buffer`` of ``make_scatter()`` to bound it).
+
+    For a trace created by ``make_scatter()`` with ``ring_buffer``,
+    the points are written into its ring buffers, and ranges of its axes
+    follow the kept points.
+
+    Parameters:
+
+    trace: trace instance or str
+      Trace in ``self.data`` or its 'uid'.
+
+    x: None or array-like
+      *x* values of the appended points. This can be None only if
+      *x* values of the trace are not given (indices are used).
+
+    y: array-like
+      *y* values of the appended points.
+
+    extend_range: bool
+      Whether ranges of the axes are widened to include the appended
+      points (or follow the kept points of ring buffers). Only ranges
+      set automatically (e.g. by ``self.show()``) are updated; ranges
+      set by users (e.g. by ``self.set_y_range()``) are kept as they are.
+
+    """
+    if isinstance(trace, str):
+      traces = [d for d in self.data if d.uid == trace]
+      if not traces:
+        raise ValueError("No trace of which uid is {}".format(trace))
+      trace = traces[0]
+
+    if not isinstance(trace, (pltgo.Scatter, pltgo.Scattergl)):
+      raise TypeError("Non supported data type: {}".format(type(trace)))
+    elif trace.uid in self._full_resolution:
+      raise ValueError("Downsampled traces cannot be extended")
+    elif y is None:
+      raise ValueError("y is required")
+    elif x is not None and len(x) != len(y):
+      raise ValueError("x and y must have the same length")
+
+    if trace.uid in self._ring_buffers:
+      self._extend_ring_trace(trace, x, y, extend_range)
+      return
+
+    if x is None and trace.x is not None:
+      raise ValueError("x is required for traces with x values")
+
+    num_old = len(trace.y) if trace.y is not None else 0
+    chunks = {
+      "x": np.arange(num_old, num_old+len(y)) if x is None else x,
+      "y": y,
+    }
+
+    old_cache = dict(self._get_extent_cache(trace))
+
+    with self.batch_update():
+      for direc in ("x", "y") if x is not None else ("y",):
+        old_values = trace[direc]
+        trace[direc] = (
+          np.asarray(chunks[direc]) if old_values is None
+          else np.concatenate((old_values, chunks[direc])))
+
+    # setting data invalidates the cache, so it is restored here
+    cache = self._get_extent_cache(trace)
+
+    for (direc, positive), extent in old_cache.items():
+      if direc == "x" and x is None:
+        cache[(direc, positive)] = extent
+      else:
+        cache[(direc, positive)] = self._merged_extent(
+          extent, self._data_extent(chunks[direc], positive))
+
+    if not extend_range:
+      return
+
+    for direc in ("x", "y"):
+
+      axis = trace[direc+"axis"] if trace[direc+"axis"] else direc
+
+      if axis not in self._axes or not self._is_auto_range(axis):
+        continue
+
+      log = self._axes[axis].layout.get("type") == "log"
+      extent = self._data_extent(chunks[direc], positive=log)
+
+      if extent is None:
+        continue
+
+      minimum, maximum = np.log10(extent) if log else extent
+
+      # padding is computed from the whole (cached) extent of the trace
+      padding = 0
+      if log or direc == "y":
+        whole = self._trace_extent(trace, direc, positive=log)
+        whole = np.log10(whole) if log else whole
+        padding = 0.05 * (whole[1] - whole[0])
+
+      current = self._axes[axis].layout["range"]
+
+      if current[0] <= minimum-padding and maximum+padding <= current[1]:
+        continue
+
+      self._relayout_axis_range(
+        axis,
+        min(minimum-padding, current[0]), max(maximum+padding, current[1]))
+
+  def _extend_ring_trace(self, trace, x, y, extend_range=True):
+    """Append points to the ring buffers of the given trace;
+    see ``self.extend_trace()``."""
+    ring_buffers = self._ring_buffers[trace.uid]
+
+    if x is None and not ring_buffers["implicit_x"]:
+      raise ValueError("x is required for traces with x values")
+    elif x is None:
+      num_pushed = ring_buffers["x"].num_pushed
+      x = np.arange(num_pushed, num_pushed+len(y))
+
+    ring_buffers["x"].push(x)
+    ring_buffers["y"].push(y)
+
+    # only the kept points are sent (and copied by Plotly's validators)
+    with self.batch_update():
+      trace.x = ring_buffers["x"].view()
+      trace.y = ring_buffers["y"].view()
+
+    if not extend_range:
+      return
+
+    for direc in ("x", "y"):
+
+      axis = trace[direc+"axis"] if trace[direc+"axis"] else direc
+
+      if axis not in self._axes or not self._is_auto_range(axis):
+        continue
+
+      axis_range = self._padded_range(
+        [
+          d for d in self.data
+          if isinstance(d, (pltgo.Scatter, pltgo.Scattergl))
+          and (d[direc+"axis"] if d[direc+"axis"] else direc) == axis
+        ],
+        axis)
+
+      if axis_range is not None:
+        self._relayout_axis_range(axis, *axis_range)
+
   # Axis Management ----------------------------------------------------
 
+  @cl.contextmanager
+  def batch_layout(self):
+    """Context manager sending changes of axis layouts made in the block
+    to a displayed FigureWidget as one relayout message.
+
+    Axis layout setters (e.g. ``set_x_ticks()``, ``set_y_range()``
+    and ``set_axis_layout()``) write layout dictionaries directly,
+    so their changes take effect in this instance at once, but they are
+    not sent to the browser until the block exits.
+
+    Examples:
+
+    >>> with fig.batch_layout():
+    ...   fig.set_x_ticks(1.0)
+    ...   fig.set_y_range(0, 10)
+    ...   fig.set_axis_layout("x\\d*", "showgrid", False)
+
+    """
+    if self._layout_batch_depth == 0:
+      for axis in self._axes.values():
+        axis.changed_keys.clear()
+
+    self._layout_batch_depth += 1
+
+    try:
+      yield
+    finally:
+      self._layout_batch_depth -= 1
+      if self._layout_batch_depth == 0:
+        self._send_axis_layout_changes()
+
+  def _send_axis_layout_changes(self):
+    """Send changed settings of axis layouts as one relayout message."""
+    relayout_data = {}
+
+    for axis in self._axes.values():
+      relayout_data.update(axis.relayout_data(axis.changed_keys))
+      axis.changed_keys.clear()
+
+    if relayout_data:
+      self._send_relayout_msg(relayout_data)
+
+  def get_grid_axes(self, direc, row=None, col=None):
+    """Return a list of names of axes of subplots in the given row
+    and/or column, which can be passed to axis setters
+    (e.g. ``self.set_axis_layout()``).
+
+    Parameters:
+
+    direc: str
+      'x' or 'y'.
+
+    row: None or int
+      Row of subplots (starting from 1 at the top).
+      If None, axes in all rows are returned.
+
+    col: None or int
+      Column of subplots (starting from 1 at the left).
+      If None, axes in all columns are returned.
+
+    """
+    if not self._has_subplots:
+      return [direc]
+
+    return list(self._grid_index.get((direc, row, col), {}))
+
   def set_axis_title(
     self, axis, name=None, symbol=None, unit=None, font={}):
     """Set a title string to the given axis.
@@ -399,9 +804,10 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
 
     Parameters:
 
-    axis: str (can be a regular expression)
+    axis: str (can be a regular expression) or list of str
       Name of axis which the range is set to.
-      You can specify multiple axes using a regular expression.
+      You can specify multiple axes using a regular expression
+      or a list of names (e.g. returned by ``self.get_grid_axes()``).
 
     minimum: number
       Minimum of the range.
@@ -410,7 +816,8 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
       Maximum of the range.
 
     """
-    if axis in self._axes and (minimum is None and maximum is None):
+    if (isinstance(axis, (list, tuple)) or axis in self._axes) and (
+      minimum is None and maximum is None):
       self.delete_axis_layout(axis, "range")
     elif minimum is not None and maximum is not None:
       self.set_axis_layout(axis, "range", [minimum, maximum])
@@ -448,9 +855,10 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
 
     Parameters:
 
-    axis: str (can be a regular expression)
+    axis: str (can be a regular expression) or list of str
       Name of axis which the range is set to.
-      You can specify multiple axes using a regular expression.
+      You can specify multiple axes using a regular expression
+      or a list of names (e.g. returned by ``self.get_grid_axes()``).
 
     interval: number
       Distance between two consecutive major ticks.
@@ -508,9 +916,10 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
 
     Parameters:
 
-    axis: str (can be a regular expression)
+    axis: str (can be a regular expression) or list of str
       Name of axis which the range is set to.
-      You can specify multiple axes using a regular expression.
+      You can specify multiple axes using a regular expression
+      or a list of names (e.g. returned by ``self.get_grid_axes()``).
 
     key: str
       Key for the layout setting.
@@ -530,47 +939,40 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
         used for drawing minor ticks.
 
     """
-    if re.match("[xy]\d*$", axis):
-      if len(axis) == 2 and axis[1] == "1":  # x1/y1 should be x/y
-        axis = axis[0]
-      if axis not in self._axes:
-        self._create_axis(axis)
-        print("New axis has been created: {}".format(axis))
-      self._axes[axis].set_layout(key, value, **kwargs)
-    else:
-      for k, v in self._axes.items():
-        if re.match(axis, k) or k in "xy" and re.match(axis, "{}1".format(k)):
-          v.set_layout(key, value, **kwargs)
+    for name in self._target_axes(axis):
+      self._axes[name].set_layout(key, value, **kwargs)
 
   def delete_axis_layout(self, axis, key):
     """Delete a layout setting of the given axis.
 
     Parameters:
 
-    axis: str (can be a regular expression)
+    axis: str (can be a regular expression) or list of str
       Name of axis which the range is set to.
-      You can specify multiple axes using a regular expression.
+      You can specify multiple axes using a regular expression
+      or a list of names (e.g. returned by ``self.get_grid_axes()``).
 
     key: str
       Key for the layout setting.
 
     """
-    if re.match("[xy]\d*$", axis):
-      if len(axis) == 2 and axis[1] == "1":  # x1/y1 should be x/y
-        axis = axis[0]
-      if axis not in self._axes:
-        self._create_axis(axis)
-        print("New axis has been created: {}".format(axis))
-      self._axes[axis].delete_layout(key)
-    else:
-      for k, v in self._axes.items():
-        if re.match(axis, k) or k in "xy" and re.match(axis, "{}1".format(k)):
-          v.delete_layout(key)
+    for name in self._target_axes(axis):
+      self._axes[name].delete_layout(key)
 
   # Private Methods ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
   # Initialization/Creation --------------------------------------------
 
+  def _initialize_layout_template(self):
+    """Apply the default template of Plotly (if any).
+
+    Without a default template, Plotly sets an empty template, which
+    is dropped from the output but validating it takes about half
+    of construction time of a figure.
+    """
+    if pio.templates.default is not None:
+      super()._initialize_layout_template()
+
   def _init_layout(self):
     """Initialize ``self._layout``
     by merging *static* ``default_layout`` with *super* ``self._layout``."""
@@ -581,6 +983,12 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
     which keeps MirroredAxisWithMinorTick instances."""
     self._axes = {}
 
+    # names of axes matching patterns; see `_match_axes()`
+    self._axis_pattern_cache = {}
+
+    # ranges set automatically; see `_is_auto_range()`
+    self._auto_ranges = {}
+
     for k in self._layout.keys():
       if re.match("[xy]axis\d*$", k):
         self._create_axis(k.replace("axis", ""))
@@ -594,24 +1002,34 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
   # Layout -------------------------------------------------------------
 
   def _layout_all(self):
-    """Arrange all traces."""
+    """Arrange all traces, and return a list of dictionaries
+    representing dummy traces required to show mirror and minor ticks.
+    """
+    self._prune_extent_cache()
+    self._dummy_axes.clear()
+
     dct = co.defaultdict(list)
 
     for d in self.data:
-      if isinstance(d, pltgo.Scatter):
+      if isinstance(d, (pltgo.Scatter, pltgo.Scattergl)):
         dct["scatter"].append(d)
       elif isinstance(d, pltgo.Heatmap):
         dct["heatmap"].append(d)
       else:
         raise TypeError("Non supported data type: {}".format(type(d)))
 
+    dummies = []
+
     if "scatter" in dct:
-      self._layout_scatter(dct["scatter"])
+      dummies += self._layout_scatter(dct["scatter"])
     if "heatmap" in dct:
-      self._layout_heatmap(dct["heatmap"])
+      dummies += self._layout_heatmap(dct["heatmap"])
+
+    return dummies
 
   def _layout_scatter(self, scatters):
-    """Arrange *Scatter* traces."""
+    """Arrange *Scatter* (and *Scattergl*) traces, and return a list of
+    dummy traces required to show mirror and minor ticks."""
     # create all axis & categorize scatters by their axis
 
     dct = co.defaultdict(list)
@@ -628,6 +1046,15 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
 
       dct[axis_pair].append(scatter)
 
+    # ranges of axes showing ring buffers follow the kept points
+    # (unless the ranges are set by users)
+
+    for axis_pair, scatters in dct.items():
+      if any(s.uid in self._ring_buffers for s in scatters):
+        for axis in axis_pair:
+          if self._is_auto_range(axis):
+            self._axes[axis].delete_layout("range")
+
     # setting for each axis
 
     skip_range_setting = {
@@ -638,21 +1065,16 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
       k: v.in_layout("dtick") for k, v in self._axes.items()
     }
 
+    dummies = []
+
     for axis_pair, scatters in dct.items():
 
       for axis in axis_pair:
 
         if not skip_range_setting[axis]:
-          if self._axes[axis].layout.get("type") == "log":
-            minimum = np.log10(min(min(s[axis[0]]) for s in scatters))
-            maximum = np.log10(max(max(s[axis[0]]) for s in scatters))
-            padding = 0.05 * (maximum - minimum)
-          else:
-            minimum = min(min(s[axis[0]]) for s in scatters)
-            maximum = max(max(s[axis[0]]) for s in scatters)
-            # set padding in y direction only
-            padding = 0 if axis[0] == "x" else 0.05 * (maximum - minimum)
-          self._extend_axis_range(axis, minimum-padding, maximum+padding)
+          axis_range = self._padded_range(scatters, axis)
+          if axis_range is not None:
+            self._extend_axis_range(axis, *axis_range)
 
         if not skip_ticks_setting[axis]:
           if self._axes[axis].layout.get("type") == "log":
@@ -663,13 +1085,32 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
             self.set_axis_layout(axis, "tickmode", "auto")
             self.set_axis_layout(axis, "nticks", 6, minor_val=34)
 
-      self._add_dummy_traces(axis_pair, self.add_scatter)
+      dummies += self._make_dummy_traces(axis_pair, "scatter")
 
     if self._range_alignment:
       self._align_subplots_range()
 
+    return dummies
+
+  def _padded_range(self, scatters, axis):
+    """Return a range of the given axis covering data of the given
+    *Scatter* traces, or None if there is no valid value."""
+    log = self._axes[axis].layout.get("type") == "log"
+    extent = self._traces_extent(scatters, axis[0], positive=log)
+
+    if extent is None:
+      return None
+
+    minimum, maximum = np.log10(extent) if log else extent
+
+    # set padding in y direction (or logarithmic axis) only
+    padding = 0.05 * (maximum - minimum) if log or axis[0] == "y" else 0
+
+    return minimum-padding, maximum+padding
+
   def _layout_heatmap(self, heatmaps, auto_size=True):
-    """Arrange *Heatmap* traces."""
+    """Arrange *Heatmap* traces, and return a list of dummy traces
+    required to show mirror and minor ticks."""
     # create all axis & categorize heatmaps by their axis
 
     dct = {}
@@ -699,19 +1140,14 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
       k: v.in_layout("dtick") for k, v in self._axes.items()
     }
 
-    for axis_pair, heatmap in dct.items():
+    dummies = []
 
-      nx, ny = np.array(heatmap.z).shape
-
-      if not heatmap.transpose:
-        nx, ny = ny, nx
+    for axis_pair, heatmap in dct.items():
 
-      for axis, n, v in zip(axis_pair, (nx, ny), (heatmap.x, heatmap.y)):
+      for axis, extent in zip(axis_pair, self._heatmap_extent(heatmap)):
 
         if not skip_range_setting[axis]:
-          minimum = v[0] if len(v) == n+1 else v[0] - 0.5*(v[1]-v[0])
-          maximum = v[-1] if len(v) == n+1 else v[-1] + 0.5*(v[-1]-v[-2])
-          self._extend_axis_range(axis, minimum, maximum)
+          self._extend_axis_range(axis, *extent)
 
         if not skip_ticks_setting[axis]:
           self.set_axis_layout(axis, "tickmode", "auto")
@@ -722,43 +1158,182 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
 
       self._axes[axis_pair[1]].layout["scaleanchor"] = axis_pair[0]
 
-      self._add_dummy_traces(axis_pair, self.add_heatmap)
+      dummies += self._make_dummy_traces(axis_pair, "heatmap")
 
     if self._range_alignment:
       self._align_subplots_range()
 
+    return dummies
+
+  # Data Extent --------------------------------------------------------
+
+  def _traces_extent(self, traces, direc, positive=False):
+    """Return minimum and maximum of data in the given direction
+    over the given traces, or None if there is no valid value."""
+    extents = [
+      e for e in (
+        self._trace_extent(t, direc, positive) for t in traces)
+      if e is not None]
+
+    if not extents:
+      return None
+
+    return min(e[0] for e in extents), max(e[1] for e in extents)
+
+  def _trace_extent(self, trace, direc, positive=False):
+    """Return (cached) minimum and maximum of data of the given trace
+    in the given direction, or None if there is no valid value."""
+    cache = self._get_extent_cache(trace)
+    key = (direc, positive)
+
+    if key not in cache:
+      # downsampled traces use their full resolution data
+      values = (
+        self._full_resolution[trace.uid]["arrays"][direc]
+        if trace.uid in self._full_resolution else trace[direc])
+      cache[key] = self._data_extent(values, positive)
+
+    return cache[key]
+
+  def _data_extent(self, values, positive=False):
+    """Return minimum and maximum of the given data usable as an axis
+    range, or None if there is no valid value.
+
+    Dates are returned in milliseconds since the epoch
+    (accepted as a range of date axes by plotly.js),
+    since ``numpy.datetime64`` is serialized as nanoseconds.
+    """
+    extent = array_extent(values, positive)
+
+    if extent is not None and np.asarray(extent[0]).dtype.kind == "M":
+      epoch, unit = np.datetime64(0, "ms"), np.timedelta64(1, "ms")
+      extent = tuple(float((e - epoch) / unit) for e in extent)
+
+    return extent
+
+  def _heatmap_extent(self, heatmap):
+    """Return (cached) ranges of *x* and *y* axes
+    covered by the given heatmap."""
+    cache = self._get_extent_cache(heatmap)
+
+    if "heatmap" not in cache and heatmap.uid in self._full_resolution:
+
+      # heatmaps shown using a pyramid use edges of the level 0
+      pyramid = self._full_resolution[heatmap.uid]
+      cache["heatmap"] = tuple(
+        (pyramid[direc][0], pyramid[direc][-1]) for direc in "xy")
+
+    elif "heatmap" not in cache:
+
+      nx, ny = grid_shape(heatmap.z)
+
+      if not heatmap.transpose:
+        nx, ny = ny, nx
+
+      cache["heatmap"] = tuple(
+        (
+          v[0] if len(v) == n+1 else v[0] - 0.5*(v[1]-v[0]),
+          v[-1] if len(v) == n+1 else v[-1] + 0.5*(v[-1]-v[-2]))
+        for n, v in zip((nx, ny), (heatmap.x, heatmap.y)))
+
+    return cache["heatmap"]
+
+  def _merged_extent(self, extent1, extent2):
+    """Return an extent covering the given two extents
+    (each of them can be None)."""
+    if extent1 is None:
+      return extent2
+    elif extent2 is None:
+      return extent1
+
+    return min(extent1[0], extent2[0]), max(extent1[1], extent2[1])
+
+  def _get_extent_cache(self, trace):
+    """Return a dictionary caching extents of the given trace.
+
+    The cache is invalidated when data of the trace is changed.
+    """
+    if trace.uid not in self._extent_cache:
+      self._extent_cache[trace.uid] = {}
+      trace.on_change(
+        self._invalidate_extent_cache, *(
+          k for k in ("x", "y", "z", "transpose") if k in trace))
+
+    return self._extent_cache[trace.uid]
+
+  def _invalidate_extent_cache(self, trace, *args):
+    """Callback invalidating cached extents of the given trace."""
+    self._extent_cache.pop(trace.uid, None)
+
+  def _prune_extent_cache(self):
+    """Remove cached extents of traces which no longer exist."""
+    uids = set(d.uid for d in self.data)
+    for uid in [k for k in self._extent_cache if k not in uids]:
+      del self._extent_cache[uid]
+
   # Dummy Traces -------------------------------------------------------
 
-  def _add_dummy_traces(self, axis_pair, callback):
-    """Add dummy traces required to show mirror and minor ticks."""
-    namepair_list = [
-      *it.product(*(self._axes[axis].mirrors for axis in axis_pair)),
-      *it.product(*(self._axes[axis].minors for axis in axis_pair))]
+  def _make_dummy_traces(self, axis_pair, trace_type):
+    """Make dummy traces required to show mirror and minor ticks.
 
-    for namepair in namepair_list:
-      dummy = callback(**{
+    The dummy traces are dictionaries (not trace instances) added only
+    to dictionaries representing this instance, since validating
+    thousands of them (e.g. for many subplots) takes a long time.
+    They are never in ``self.data``, so they need no registry
+    for removing them, and user traces cannot delete them by accident.
+    """
+    if self._dummy_mode == "shared":
+      namepair_list = self._shared_dummy_namepairs(axis_pair)
+    else:
+      namepair_list = [
+        *it.product(*(self._axes[axis].mirrors for axis in axis_pair)),
+        *it.product(*(self._axes[axis].minors for axis in axis_pair))]
+
+    return [
+      {
+        "type": trace_type,
         "visible": False,
         **{"{}axis".format(name[0]): name for name in namepair}
-      })
-      self._dummy_uids.append(dummy["uid"])
+      }
+      for namepair in namepair_list
+    ]
+
+  def _shared_dummy_namepairs(self, axis_pair):
+    """Return pairs of axis names covering mirror and minor axes
+    of the given axis pair which are not referenced by dummy traces yet.
+    """
+    uncovered = [
+      [
+        name for name in self._axes[axis].mirrors + self._axes[axis].minors
+        if name not in self._dummy_axes
+      ]
+      for axis in axis_pair]
 
-  def _clear_dummy_traces(self):
-    """Delete all dummy traces of which 'uid' is in ``self._dummy_uids``."""
-    prev_len = len(self.data)
+    if not any(uncovered):
+      return []
 
-    self.data = tuple(
-      d for d in self.data if d.uid not in self._dummy_uids)
+    # fill a shorter side with an already referenced axis
+    fillers = [
+      names[0] if names else self._axes[axis].mirrors[0]
+      for names, axis in zip(uncovered, axis_pair)]
 
-    if prev_len - len(self.data) == len(self._dummy_uids):
-      self._dummy_uids.clear()
-    else:
-      raise RuntimeError("Dummy trace might be deleted accidentally")
+    namepair_list = [
+      tuple(
+        filler if name is None else name
+        for name, filler in zip(namepair, fillers))
+      for namepair in it.zip_longest(*uncovered)]
+
+    self._dummy_axes.update(it.chain.from_iterable(namepair_list))
+
+    return namepair_list
 
   # Subplots -----------------------------------------------------------
 
   def _make_subplots(
     self, trace_array, share, xspace_factor=1.0, yspace_factor=1.0, **kwargs):
-    """Make subplots using ``plotly.tools.make_subplots()``."""
+    """Make subplots; domains and axis layouts are computed directly
+    (see ``_subplot_axis_layouts()``) unless *kwargs* contains options
+    supported only by ``plotly.tools.make_subplots()``."""
     self._clear_axes()
 
     kwargs["shared_xaxes"] = "x" in share
@@ -778,22 +1353,31 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
     kwargs["vertical_spacing"] = yspace_factor * (
       0.1 if kwargs["shared_xaxes"] else 0.3) / n_row
 
-    fig = tools.make_subplots(rows=n_row, cols=n_col, **kwargs)
-
-    # store axis layout of created Figure instance
-    axis_layouts = {
-      k.replace("axis", ""): v
-      for k, v in fig._layout.items() if re.match("[xy]axis\d*$", k)
-    }
-
-    # set subplot titles
-    if "annotations" in fig.layout:
-      for annotation in fig.layout.annotations:
-        annotation["font"] = self.layout.title.font.to_plotly_json()
-      if "annotations" in self.layout:
-        self.layout.annotations += fig.layout.annotations
-      else:
-        self.layout.annotations = fig.layout.annotations
+    if self._is_simple_grid(kwargs):
+      axis_layouts, grid_ref, annotations = self._subplot_axis_layouts(
+        n_row, n_col, **kwargs)
+      if kwargs.get("print_grid", True):
+        self._show_subplot_grid([
+          [",".join(cell) if cell else "(empty)" for cell in row]
+          for row in grid_ref])
+    else:
+      fig = tools.make_subplots(rows=n_row, cols=n_col, **kwargs)
+      # store axis layout of created Figure instance
+      axis_layouts = {
+        k.replace("axis", ""): v
+        for k, v in fig._layout.items() if re.match("[xy]axis\d*$", k)
+      }
+      grid_ref = fig._grid_ref
+      annotations = fig._layout.get("annotations", [])
+
+    # set subplot titles (at once)
+    if annotations:
+      font = self.layout.title.font.to_plotly_json()
+      for annotation in annotations:
+        annotation["font"] = font
+      self.layout.annotations = (
+        *(self.layout.annotations if "annotations" in self.layout else ()),
+        *annotations)
 
     # convert x1/y1 to x/y
     self._grid_ref = [
@@ -801,10 +1385,24 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
         tuple(a[0] if a[1:] == "1" else a for a in cell)
         if cell else None for cell in row
       ]
-      for row in fig._grid_ref
+      for row in grid_ref
     ]
 
-    flatten_array = []
+    # names of axes indexed by direction, row and column
+    # (None for all rows or columns); see `get_grid_axes()`
+    # (dictionaries are used as ordered sets of the names)
+    self._grid_index = co.defaultdict(dict)
+
+    for irow, row in enumerate(self._grid_ref, 1):
+      for icol, cell in enumerate(row, 1):
+        if cell is None: continue
+        for direc, axis in zip("xy", cell):
+          for key in [
+            (direc, irow, icol), (direc, irow, None),
+            (direc, None, icol), (direc, None, None)]:
+            self._grid_index[key][axis] = None
+
+    flatten_rows = []
 
     # loop from bottom
     for row1, row2 in zip(trace_array[::-1], self._grid_ref[::-1]):
@@ -817,19 +1415,139 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
           flatten_row.append(trace)
 
         for axis, opposite in [axis_pair, axis_pair[::-1]]:
-          tmp_layout = cp.deepcopy(axis_layouts[axis])
           # NOTE: Official tools.make_subplots() uses 'free' as anchor.
           # Will something wrong occur by assigning opposite axis as anchor?
-          tmp_layout["anchor"] = opposite
+          # (axis layouts are copied by `dict.update()` of the axis,
+          # so that neither deep copy nor a temporary dictionary is needed)
           if axis not in self._axes:
-            self._create_axis(axis, **tmp_layout)
+            self._create_axis(
+              axis, **{**axis_layouts[axis], "anchor": opposite})
           else:
-            self._axes[axis].append_mirror_axis(**tmp_layout)
-            self._axes[axis].append_minor_axis(**tmp_layout)
-
-      flatten_array = flatten_row + flatten_array
+            self._axes[axis].append_mirror_axis(
+              **{**axis_layouts[axis], "anchor": opposite})
+            self._axes[axis].append_minor_axis(
+              **{**axis_layouts[axis], "anchor": opposite})
+
+      flatten_rows.append(flatten_row)
+
+    return list(it.chain.from_iterable(flatten_rows[::-1]))
+
+  def _is_simple_grid(self, kwargs):
+    """Whether the given keyword arguments for subplots are supported
+    by ``_subplot_axis_layouts()`` or not."""
+    supported = {
+      "specs", "shared_xaxes", "shared_yaxes", "horizontal_spacing",
+      "vertical_spacing", "column_width", "row_width", "subplot_titles",
+      "print_grid"}
+    spec_keys = {"colspan", "rowspan", "l", "r", "b", "t", "is_3d"}
+
+    return (
+      set(kwargs) <= supported
+      and all(
+        isinstance(spec, dict) and set(spec) <= spec_keys
+        and not spec.get("is_3d", False)
+        for row in kwargs["specs"] for spec in row if spec is not None)
+      and (
+        "subplot_titles" not in kwargs
+        or not (kwargs["shared_xaxes"] or kwargs["shared_yaxes"])))
+
+  def _subplot_axis_layouts(
+    self, n_row, n_col, specs, shared_xaxes, shared_yaxes,
+    horizontal_spacing, vertical_spacing, column_width=None, row_width=None,
+    subplot_titles=(), print_grid=True):
+    """Return axis layouts (only 'domain', 'anchor' and 'position'),
+    a grid of axis pairs and annotations for subplot titles,
+    which are the same as those of ``plotly.tools.make_subplots()``
+    (starting from the top-left cell) without validation by plotly."""
+    def sizes(weights, n, spacing):
+      total = 1.0 - spacing * (n-1)
+      if weights is None:
+        return [total / n] * n
+      return [total * (w / float(sum(weights))) for w in weights]
+
+    widths = sizes(column_width, n_col, horizontal_spacing)
+    heights = sizes(row_width, n_row, vertical_spacing)
+
+    # left and bottom edges of cells (rows are counted from the top)
+    lefts = [sum(widths[:c]) + c*horizontal_spacing for c in range(n_col)]
+    bottoms = [
+      sum(heights[:n_row-1-r]) + (n_row-1-r)*vertical_spacing
+      for r in range(n_row)]
+
+    axis_layouts = {}
+    grid_ref = [[None] * n_col for _ in range(n_row)]
+    domains = []
+
+    def add_domain(label, domain, anchor, position):
+      layout = {
+        "domain": [max(0.0, domain[0]), min(1.0, domain[1])],
+        "anchor": anchor}
+      if anchor == "free":
+        layout["position"] = position
+      # keys are the same as those in `self._axes` (e.g. 'x' for 'x1')
+      axis_layouts[label[0] if label[1:] == "1" else label] = layout
+
+    x_cnt = y_cnt = 1
+
+    for r, spec_row in enumerate(specs):
+      for c, spec in enumerate(spec_row):
+        if spec is None: continue
+
+        c_spanned = c + spec.get("colspan", 1) - 1
+        r_spanned = r + spec.get("rowspan", 1) - 1
+
+        if n_col <= c_spanned:
+          raise RuntimeError("Some 'colspan' value is too large")
+        if n_row <= r_spanned:
+          raise RuntimeError("Some 'rowspan' value is too large")
+
+        x_domain = [
+          lefts[c] + spec.get("l", 0.0),
+          lefts[c_spanned] + widths[c] - spec.get("r", 0.0)]
+        y_domain = [
+          bottoms[r_spanned] + spec.get("b", 0.0),
+          bottoms[r] + heights[-1-r] - spec.get("t", 0.0)]
+
+        x_label = "x{}".format(c+1 if shared_xaxes else x_cnt)
+        y_label = "y{}".format(r+1 if shared_yaxes else y_cnt)
+
+        # anchors of the axes; False for axes not added to layout
+        x_anchor, y_anchor = "y{}".format(y_cnt), "x{}".format(x_cnt)
+
+        if shared_xaxes and r != n_row-1:
+          x_anchor = False
+          y_anchor = False if shared_yaxes and c != 0 else "free"
+        elif shared_yaxes and c != 0:
+          y_anchor = False
+          x_anchor = "free"
+
+        if x_anchor:
+          add_domain(x_label, x_domain, x_anchor, y_domain[0])
+          x_cnt += 1
+        if y_anchor:
+          add_domain(y_label, y_domain, y_anchor, x_domain[0])
+          y_cnt += 1
+
+        grid_ref[r][c] = (x_label, y_label)
+        domains.append((x_domain, y_domain))
+
+    annotations = [
+      {
+        "y": y_domain[1],
+        "xref": "paper",
+        "x": sum(x_domain) / 2,
+        "yref": "paper",
+        "text": title,
+        "showarrow": False,
+        "font": {"size": 16},
+        "xanchor": "center",
+        "yanchor": "bottom",
+      }
+      for title, (x_domain, y_domain) in zip(subplot_titles, domains)
+      if title
+    ]
 
-    return flatten_array
+    return axis_layouts, grid_ref, annotations
 
   def _compare_grid(self, grid1, grid2):
     """Whether shapes of two grids are equivalent or not."""
@@ -900,7 +1618,11 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
 
       minimum = min(self._axes[axis].layout["range"][0] for axis in v)
       maximum = max(self._axes[axis].layout["range"][1] for axis in v)
-      self.set_axis_range(k, minimum, maximum)
+
+      if self._is_auto_range(k):
+        self._set_auto_range(k, minimum, maximum)
+      else:
+        self.set_axis_range(k, minimum, maximum)
 
       if axis_type == "log":
         self.set_axis_ticks(
@@ -940,15 +1662,48 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
   def _create_axis(self, axis, **kwargs):
     """Create an instance of MirroredAxisWithMinorTick."""
     self._axes[axis] = MirroredAxisWithMinorTick(axis, self._layout, **kwargs)
+    self._axis_pattern_cache.clear()
 
   def _clear_axes(self):
     """Remove all axis layouts."""
     self._axes.clear()
+    self._axis_pattern_cache.clear()
+    self._auto_ranges.clear()
     axis_layout_keys = [
       k for k in self._layout.keys() if re.match("[xy]axis\d*$", k)]
     for k in axis_layout_keys:
       del self._layout[k]
 
+  def _target_axes(self, axis):
+    """Return names of axes specified by the given name, pattern
+    or list of them; an axis specified by its name is created
+    if it does not exist."""
+    if isinstance(axis, (list, tuple)):
+      return [name for a in axis for name in self._target_axes(a)]
+
+    if not _axis_name_pattern.match(axis):
+      return self._match_axes(axis)
+
+    if len(axis) == 2 and axis[1] == "1":  # x1/y1 should be x/y
+      axis = axis[0]
+
+    if axis not in self._axes:
+      self._create_axis(axis)
+      print("New axis has been created: {}".format(axis))
+
+    return (axis,)
+
+  def _match_axes(self, pattern):
+    """Return (cached) names of axes matching the given pattern
+    (x/y also match as x1/y1)."""
+    if pattern not in self._axis_pattern_cache:
+      regex = re.compile(pattern)
+      self._axis_pattern_cache[pattern] = tuple(
+        k for k in self._axes
+        if regex.match(k) or k in "xy" and regex.match(k + "1"))
+
+    return self._axis_pattern_cache[pattern]
+
   def _make_axis_title_string(self, name=None, symbol=None, unit=None):
     """Make a string for axis title."""
     title = str(name)
@@ -972,12 +1727,42 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
     ``minimum`` and ``maximum`` will be set as it is.
     """
     if self._axes[axis].in_layout("range"):
-      self.set_axis_range(
+      self._set_auto_range(
         axis,
         min(minimum, self._axes[axis].layout["range"][0]),
         max(maximum, self._axes[axis].layout["range"][1]))
     else:
-      self.set_axis_range(axis, minimum, maximum)
+      self._set_auto_range(axis, minimum, maximum)
+
+  def _set_auto_range(self, axis, minimum, maximum):
+    """Set a range to the given axis, which is recorded as a range set
+    automatically; see ``self._is_auto_range()``."""
+    self.set_axis_range(axis, minimum, maximum)
+    self._auto_ranges[axis] = list(self._axes[axis].layout["range"])
+
+  def _is_auto_range(self, axis):
+    """Return whether the range of the given axis is set automatically
+    (e.g. by ``self.show()``), not by users.
+
+    A range is regarded as set by users if it differs from the range
+    last set by ``self._set_auto_range()``.
+    """
+    return (
+      axis in self._auto_ranges
+      and self._axes[axis].layout.get("range") == self._auto_ranges[axis])
+
+  def _relayout_axis_range(self, axis, minimum, maximum):
+    """Set a range to the given axis (and its mirror and minor axes),
+    and send the change to a displayed FigureWidget (if any)."""
+    self._set_auto_range(axis, minimum, maximum)
+
+    # mirror and minor axes are not known to `self.layout`,
+    # so the message is sent directly instead of `self.plotly_relayout()`
+    self._send_relayout_msg({
+      "{}axis{}.range".format(name[0], name[1:]): [minimum, maximum]
+      for name in [
+        axis, *self._axes[axis].mirrors, *self._axes[axis].minors]
+    })
 
   def _auto_axis_ticks(self, axis_range, log=False):
     """Automatically determine ``interval`` and ``num_minor``,
@@ -1079,11 +1864,336 @@ class ExtendedFigureWidget(pltgo.FigureWidget):
 
   # Miscellaneous ------------------------------------------------------
 
+  def _title_indices(self):
+    """Return a dictionary from names of annotations used
+    as axis titles ('x-title' and 'y-title') to their indices."""
+    return {
+      a["name"]: i for i, a in enumerate(self.layout.annotations)
+      if isinstance(a.name, str) and a.name.endswith("-title")
+    } if "annotations" in self.layout else {}
+
+  def _laid_out_dict(self):
+    """Return a dictionary representing this instance after arranging
+    all traces (dummy traces are included only in the dictionary)."""
+    dummies = self._layout_all()
+
+    figure = self.to_dict()
+    figure["data"].extend(dummies)
+
+    return figure
+
   def _set_data(self, data):
     """Set the given data to ``self.data`` after clearing previous data."""
     self.data = tuple()
     self.add_traces(data)
 
+    # traces are cloned (and get new 'uid') by `add_traces()`,
+    # so private members of the given traces are stored here
+    self._full_resolution = {
+      added.uid: trace._full_resolution
+      for added, trace in zip(self.data, data)
+      if getattr(trace, "_full_resolution", None) is not None
+    }
+    self._ring_buffers = {
+      added.uid: trace._ring_buffers
+      for added, trace in zip(self.data, data)
+      if getattr(trace, "_ring_buffers", None) is not None
+    }
+
+#=======================================================================
+
+class ExtendedFigureWidget(_ExtendedFigureBase, pltgo.FigureWidget):
+  """Inheriting ``plotly.graph_objs.FigureWidget``.
+
+  Original FigureWidget's functionalities *plus* the following features.
+
+  * Show myself (using ``plotly.offline.iplot()``).
+  * Make subplots (using ``plotly.tools.make_subplots()``).
+  * Manage legend and titles.
+  * Manage axis layout.
+  * Coalesce and rate-limit updates sent to the browser.
+
+  """
+
+  # state of coalescing updates; see `start_update_scheduler()`
+  # (a class member because messages are sent in `__init__()`)
+  _scheduler = None
+
+  def start_update_scheduler(self, max_rate=10, loop=None):
+    """Coalesce updates of data and layout sent to the browser,
+    and send them at most ``max_rate`` times per second.
+
+    While the scheduler runs, changes of data and layout are not sent
+    one by one; only the latest value of each property is kept
+    (intermediate states are dropped), and the kept values are sent
+    as one update. The update is sent at once if the previous one was
+    sent earlier than ``1/max_rate`` seconds ago; otherwise it is sent
+    later by the asyncio event loop (e.g. of the Jupyter kernel), or
+    by a timer thread if the event loop is not running. Changes can be
+    made from any thread.
+
+    Parameters:
+
+    max_rate: float
+      Maximum number of updates sent per second.
+
+    loop: None or asyncio.AbstractEventLoop
+      Event loop sending delayed updates. If None, the event loop
+      running in the calling thread (if any) is used.
+
+    """
+    self.stop_update_scheduler()
+
+    if loop is None:
+      try:
+        loop = asyncio.get_running_loop()
+      except RuntimeError:
+        pass
+
+    self._scheduler = {
+      "interval": 1.0 / max_rate,
+      "loop": loop,
+      "lock": threading.RLock(),
+      "timer": None,
+      "timer_id": None,
+      "last_flush": -np.inf,
+      "restyle": {},
+      "relayout": {},
+      "source_view_id": None,
+    }
+
+  def stop_update_scheduler(self):
+    """Send pending updates and stop coalescing them."""
+    if self._scheduler is not None:
+      self._flush_updates()
+      self._scheduler = None
+
+  # Update Scheduling --------------------------------------------------
+
+  def _send_restyle_msg(
+    self, restyle_data, trace_indexes=None, source_view_id=None):
+    """Send a restyle message, or keep its changes to be coalesced
+    by the update scheduler if it runs."""
+    restyle_data = self._sendable_data(restyle_data)
+    if self._scheduler is None:
+      super()._send_restyle_msg(restyle_data, trace_indexes, source_view_id)
+    else:
+      self._schedule_updates(
+        restyle_data, {}, trace_indexes, source_view_id)
+
+  def _send_relayout_msg(self, layout_data, source_view_id=None):
+    """Send a relayout message, or keep its changes to be coalesced
+    by the update scheduler if it runs."""
+    if self._scheduler is None:
+      super()._send_relayout_msg(layout_data, source_view_id)
+    else:
+      self._schedule_updates({}, layout_data, [], source_view_id)
+
+  def _send_update_msg(
+    self, restyle_data, relayout_data, trace_indexes=None,
+    source_view_id=None):
+    """Send an update message, or keep its changes to be coalesced
+    by the update scheduler if it runs."""
+    restyle_data = self._sendable_data(restyle_data)
+    if self._scheduler is None:
+      super()._send_update_msg(
+        restyle_data, relayout_data, trace_indexes, source_view_id)
+    else:
+      self._schedule_updates(
+        restyle_data, relayout_data, trace_indexes, source_view_id)
+
+  def _send_addTraces_msg(self, new_traces_data):
+    """Send an addTraces message after updates queued
+    by the update scheduler (if any)."""
+    self._flush_updates()
+    super()._send_addTraces_msg(new_traces_data)
+
+  def _send_moveTraces_msg(self, current_inds, new_inds):
+    """Send a moveTraces message after updates queued
+    by the update scheduler (if any)."""
+    self._flush_updates()
+    super()._send_moveTraces_msg(current_inds, new_inds)
+
+  def _send_deleteTraces_msg(self, delete_inds):
+    """Send a deleteTraces message after updates queued
+    by the update scheduler (if any)."""
+    self._flush_updates()
+    super()._send_deleteTraces_msg(delete_inds)
+
+  def _send_animate_msg(self, *args, **kwargs):
+    """Send an animate message after updates queued
+    by the update scheduler (if any)."""
+    self._flush_updates()
+    super()._send_animate_msg(*args, **kwargs)
+
+  def _sendable_data(self, restyle_data):
+    """Return a copy of the given restyle data where arrays of 64-bit
+    integers are converted to floats.
+
+    FigureWidget sends 64-bit integers as a list (very slow), while
+    floats are sent as a binary buffer. Only the sent data is converted;
+    data of traces keep their types.
+    """
+    def sendable(values):
+      if isinstance(values, np.ndarray) and (
+        values.dtype.kind in "iu" and values.dtype.itemsize == 8):
+        return values.astype(float)
+      return values
+
+    return {
+      key: [sendable(v) for v in val] if isinstance(val, list)
+      else sendable(val)
+      for key, val in restyle_data.items()
+    }
+
+  def _schedule_updates(
+    self, restyle_data, relayout_data, trace_indexes, source_view_id=None):
+    """Keep the given changes until the next flush,
+    which is performed at once or scheduled."""
+    scheduler = self._scheduler
+
+    with scheduler["lock"]:
+
+      # the view which made all the kept changes (if any) is passed on,
+      # so that the changes are not applied to the view again
+      if not scheduler["restyle"] and not scheduler["relayout"]:
+        scheduler["source_view_id"] = source_view_id
+      elif scheduler["source_view_id"] != source_view_id:
+        scheduler["source_view_id"] = None
+
+      # re-inserting keys keeps the order of changes
+      # (e.g. 'xaxis.range' after 'xaxis')
+
+      indexes = self._normalize_trace_indexes(trace_indexes)
+
+      for i, index in enumerate(indexes):
+        pending = scheduler["restyle"].setdefault(index, {})
+        for key, val in restyle_data.items():
+          pending.pop(key, None)
+          # a list contains a value for each trace
+          pending[key] = val[i % len(val)] if isinstance(val, list) else val
+
+      for key, val in relayout_data.items():
+        scheduler["relayout"].pop(key, None)
+        scheduler["relayout"][key] = val
+
+      self._flush_or_schedule()
+
+  def _flush_or_schedule(self):
+    """Flush pending changes if the interval has passed since the last
+    flush; otherwise schedule a flush (unless already scheduled)."""
+    scheduler = self._scheduler
+
+    if scheduler is None:
+      return
+
+    with scheduler["lock"]:
+
+      delay = (
+        scheduler["last_flush"] + scheduler["interval"] - time.monotonic())
+
+      if delay <= 0:
+        self._flush_updates()
+      elif scheduler["timer"] is None:
+        scheduler["timer_id"] = object()
+        scheduler["timer"] = self._start_timer(delay, scheduler["timer_id"])
+
+  def _start_timer(self, delay, timer_id):
+    """Call ``self._on_timer(timer_id)`` after the given delay
+    (in seconds) by the event loop if it is running, or by a timer
+    thread otherwise, and return an object of which ``cancel()``
+    cancels the call."""
+    loop = self._scheduler["loop"]
+
+    if loop is not None and loop.is_running():
+
+      try:
+        in_loop = asyncio.get_running_loop() is loop
+      except RuntimeError:
+        in_loop = False
+
+      if in_loop:
+        return loop.call_later(delay, self._on_timer, timer_id)
+
+      # `call_later()` is not thread-safe
+      future = asyncio.run_coroutine_threadsafe(asyncio.sleep(delay), loop)
+      future.add_done_callback(
+        lambda f: f.cancelled() or self._on_timer(timer_id))
+      return future
+
+    timer = threading.Timer(delay, self._on_timer, (timer_id,))
+    timer.daemon = True
+    timer.start()
+
+    return timer
+
+  def _on_timer(self, timer_id):
+    """Flush pending changes when a scheduled flush is due."""
+    scheduler = self._scheduler
+
+    if scheduler is None:
+      return
+
+    with scheduler["lock"]:
+
+      # a timer cancelled after it fired is ignored
+      if scheduler["timer_id"] != timer_id:
+        return
+
+      scheduler["timer"] = None
+      if scheduler["restyle"] or scheduler["relayout"]:
+        self._flush_or_schedule()
+
+  def _flush_updates(self):
+    """Send pending changes as update messages; traces having the same
+    changed properties are updated by one message."""
+    scheduler = self._scheduler
+
+    if scheduler is None:
+      return
+
+    with scheduler["lock"]:
+
+      if scheduler["timer"] is not None:
+        scheduler["timer"].cancel()
+        scheduler["timer"] = None
+
+      restyle, relayout = scheduler["restyle"], scheduler["relayout"]
+      source_view_id = scheduler["source_view_id"]
+
+      if not restyle and not relayout:
+        return
+
+      scheduler["restyle"], scheduler["relayout"] = {}, {}
+      scheduler["last_flush"] = time.monotonic()
+
+      groups = co.defaultdict(list)
+      for index, pending in restyle.items():
+        groups[tuple(pending)].append(index)
+
+      if not groups:
+        super()._send_relayout_msg(relayout, source_view_id)
+
+      for keys, indexes in groups.items():
+        super()._send_update_msg(
+          {k: [restyle[i][k] for i in indexes] for k in keys},
+          relayout, indexes, source_view_id)
+        relayout = {}
+
+class ExtendedFigure(_ExtendedFigureBase, pltgo.Figure):
+  """Inheriting ``plotly.graph_objs.Figure``.
+
+  Lightweight sibling of ``ExtendedFigureWidget`` without ipywidgets
+  machinery (comm and trait synchronization), suited for building many
+  figures in scripts. This class has the same features and API
+  as ``ExtendedFigureWidget``.
+
+  Most of construction time and memory of both classes is taken by
+  validation of Plotly's layout, not by the widget machinery
+  (see ``benchmarks/bench_figure_construction.py``).
+
+  """
+
 #=======================================================================
 
 class MirroredAxisWithMinorTick:
@@ -1098,7 +2208,7 @@ class MirroredAxisWithMinorTick:
   # NOTE: `mirror="ticks"` cannot be used,
   # because mirroring ticks breaks auto margin (for labeled axis).
   main_default_layout = {
-    **cp.deepcopy(common_default_layout),
+    **common_default_layout,
     "title": {
       "font": {"size": 20}
     },
@@ -1110,14 +2220,14 @@ class MirroredAxisWithMinorTick:
   }
 
   mirror_default_layout = {
-    **cp.deepcopy(common_default_layout),
+    **common_default_layout,
     "showline": False,
     "showticklabels": False,
     "ticklen": 5,
   }
 
   minor_default_layout = {
-    **cp.deepcopy(common_default_layout),
+    **common_default_layout,
     "showline": True,  # only one axis may show line
     "showticklabels": False,
     "ticklen": 3,
@@ -1138,7 +2248,8 @@ class MirroredAxisWithMinorTick:
       self.direc, self.index if 1 < self.index else "")
 
     # NOTE: `self.layout` of this class is NOT an instance of
-    # `plotly.graph_objs.Layout`, but just a Python dictionary.
+    # `plotly.graph_objs.Layout`, but just a Python dictionary
+    # (`LayeredDict` sharing values with the default layout).
     self.layout = self.parent_layout[layout_key] = merged_dict(
       type(self).main_default_layout,
       self.parent_layout.get(layout_key, {}))
@@ -1153,6 +2264,10 @@ class MirroredAxisWithMinorTick:
 
     self.layout.update(**kwargs)
 
+    # keys of settings changed by `set_layout()` or `delete_layout()`;
+    # see `batch_layout()` of figure classes
+    self.changed_keys = set()
+
     self.mirrors = []
     self.minors = []
     self._mirror_layouts = []
@@ -1163,6 +2278,7 @@ class MirroredAxisWithMinorTick:
 
   def delete_layout(self, key):
     """Delete a layout setting specified by *key*."""
+    self.changed_keys.add(key)
     if key in self.layout:
       del self.layout[key]
     for mirror_layout in self._mirror_layouts:
@@ -1184,8 +2300,12 @@ class MirroredAxisWithMinorTick:
     # Setting 'tickfont' restores the original font size.
     if key == "exponentformat" and val == "power":
       self.layout["tickfont"]["size"] /= 1.25
+      self.changed_keys.add("tickfont")
     elif key == "tickformat" and self.layout.get("exponentformat") == "power":
       self.layout["tickfont"]["size"] *= 1.25
+      self.changed_keys.add("tickfont")
+
+    self.changed_keys.add(key)
 
     self.layout[key] = val
     for mirror_layout in self._mirror_layouts:
@@ -1193,6 +2313,18 @@ class MirroredAxisWithMinorTick:
     for minor_layout in self._minor_layouts:
       minor_layout[key] = minor_val
 
+  def relayout_data(self, keys):
+    """Return a dictionary from property paths (e.g. 'xaxis101.dtick')
+    to current values (None for deleted ones) of the given keys
+    in layouts of this axis and its mirror/minor axes."""
+    return {
+      "{}axis{}.{}".format(name[0], name[1:], key): layout.get(key)
+      for name, layout in zip(
+        [self.name, *self.mirrors, *self.minors],
+        [self.layout, *self._mirror_layouts, *self._minor_layouts])
+      for key in keys
+    }
+
   def in_layout(self, key):
     """Whether a layout setting specified by *key* exists ot not."""
     return all(
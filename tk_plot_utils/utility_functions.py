@@ -1,12 +1,15 @@
 """Submodule containing utility functions."""
 
 import copy as cp
+import numpy as np
+import collections as co
+import contextlib as cl
 
 def merged_dict(dct, merge_dct):
   """Make a new dictionary by merging two dictionaries.
 
-  Return a *new* merged dictionary initially *deep-copied* from
-  the first given dictionary; the given two dictionaries stay unchanged.
+  Return a *new* merged ``LayeredDict`` layered on the first given
+  dictionary; the given two dictionaries stay unchanged.
 
   Parameters:
 
@@ -18,14 +21,313 @@ def merged_dict(dct, merge_dct):
     The second dictionary to be merged.
 
   """
-  tmp = cp.deepcopy(dct)
+  tmp = LayeredDict(dct)
   _merge_dict(tmp, merge_dct)
   return tmp
 
 def _merge_dict(dct, merge_dct):
   """Recursive part of ``merged_dict()``."""
   for k, v in merge_dct.items():
-    if (k in dct and isinstance(dct[k], dict) and isinstance(v, dict)):
+    if (isinstance(v, dict) and k in dct and isinstance(dct[k], dict)):
       _merge_dict(dct[k], v)
     else:
       dct[k] = v
+
+class LayeredDict(dict):
+  """Dictionary layered on a dictionary of default values
+  (copy-on-write).
+
+  Values of the defaults are not copied but shared at construction.
+  A shared container value (e.g. a nested dictionary) is copied
+  when it is accessed by its key (``d[key]``, ``d.get(key)``,
+  ``d.setdefault(key)`` or ``d.pop(key)``), so that only overridden
+  values are materialized and the defaults stay unchanged.
+  A nested dictionary is also copied as ``LayeredDict``.
+
+  Note that values obtained by iteration (e.g. ``d.items()``)
+  may be shared ones, which must not be modified.
+
+  A copy (including a deep copy) of this dictionary is
+  a plain dictionary, which is what plotly expects.
+
+  """
+
+  __slots__ = ("_defaults",)
+
+  def __init__(self, defaults):
+    """
+    Parameters:
+
+    defaults: dict
+      Dictionary of default values, which is never modified
+      through this instance.
+
+    """
+    super().__init__(defaults)
+    self._defaults = defaults
+
+  def __getitem__(self, key):
+    val = super().__getitem__(key)
+
+    # raw value of the defaults (not copied even if they are layered)
+    if isinstance(val, (dict, list)) and val is dict.get(self._defaults, key):
+      val = LayeredDict(val) if isinstance(val, dict) else cp.deepcopy(val)
+      super().__setitem__(key, val)
+
+    return val
+
+  def __copy__(self):
+    return cp.deepcopy(self)
+
+  def __deepcopy__(self, memo):
+    return {k: cp.deepcopy(v, memo) for k, v in super().items()}
+
+  def __reduce__(self):
+    return (dict, (self.copy(),))
+
+  def get(self, key, default=None):
+    return self[key] if key in self else default
+
+  def setdefault(self, key, default=None):
+    if key not in self:
+      self[key] = default
+    return self[key]
+
+  def pop(self, key, *args):
+    if key in self:
+      val = self[key]
+      del self[key]
+      return val
+    return super().pop(key, *args)
+
+  def popitem(self):
+    key, val = super().popitem()
+    if val is dict.get(self._defaults, key):
+      val = cp.deepcopy(val)
+    return key, val
+
+  def copy(self):
+    return self.__copy__()
+
+def array_extent(values, positive=False):
+  """Return a tuple of minimum and maximum of the given array-like data,
+  or None if there is no valid value.
+
+  NaN, inf and NaT are ignored. Numeric, datetime64 and list data
+  (including a list of date strings) are supported. A given
+  ``numpy.ndarray`` is not copied.
+
+  Parameters:
+
+  values: array-like
+    Data of which extent is computed.
+
+  positive: bool
+    If True, non-positive values are also ignored
+    (used for logarithmic axes).
+
+  """
+  if values is None:
+    return None
+
+  arr = _as_extent_array(values)
+
+  if arr is None or arr.size == 0:
+    return None
+
+  if arr.dtype.kind == "M":
+    valid = ~np.isnat(arr)
+  else:
+    valid = np.isfinite(arr)
+    if positive:
+      valid &= 0 < arr
+
+  if valid.all():
+    return arr.min(), arr.max()
+  elif not valid.any():
+    return None
+  elif arr.dtype.kind == "f":
+    return (
+      arr.min(where=valid, initial=np.inf),
+      arr.max(where=valid, initial=-np.inf))
+  else:
+    _record_copy("array_extent")
+    arr = arr[valid]
+    return arr.min(), arr.max()
+
+def grid_shape(values):
+  """Return shape of the given two-dimensional array-like data
+  without converting it to ``numpy.ndarray``."""
+  if hasattr(values, "shape"):
+    return tuple(values.shape)
+  return len(values), len(values[0])
+
+def _as_extent_array(values):
+  """Convert the given data to a numeric or datetime64 array;
+  return None if the conversion fails."""
+  arr = np.asarray(values)
+
+  if arr is not values:
+    _record_copy("array_extent")
+
+  if arr.dtype.kind in "biufM":
+    return arr
+
+  for dtype in (float, "datetime64[ns]"):
+    try:
+      converted = arr.astype(dtype)
+      _record_copy("array_extent")
+      return converted
+    except (TypeError, ValueError):
+      pass
+
+  return None
+
+class RingBuffer:
+  """Buffer keeping the newest values of a one-dimensional array
+  up to a fixed capacity.
+
+  Every value is written twice in a preallocated array of twice the
+  capacity, so that the kept values are always available as a contiguous
+  view (see ``view()``) without any reallocation or copy.
+  """
+
+  def __init__(self, capacity, dtype=float):
+    """
+    Parameters:
+
+    capacity: int
+      Maximum number of kept values.
+
+    dtype: data-type
+      Data type of the values.
+
+    """
+    if capacity < 1:
+      raise ValueError("capacity must be 1 or more")
+
+    self.capacity = capacity
+
+    # total number of pushed values (including discarded ones)
+    self.num_pushed = 0
+
+    self._buffer = np.empty(2*capacity, dtype=dtype)
+    self._end = 0
+    self._size = 0
+
+  def __len__(self):
+    return self._size
+
+  def push(self, values):
+    """Append the given values, discarding the oldest ones
+    exceeding the capacity."""
+    values = np.asarray(values, dtype=self._buffer.dtype)
+    self.num_pushed += len(values)
+    values = values[max(len(values)-self.capacity, 0):]
+
+    c, n = self.capacity, len(values)
+    first = min(n, c-self._end)
+
+    for offset in (0, c):
+      self._buffer[self._end+offset:self._end+offset+first] = values[:first]
+      self._buffer[offset:offset+n-first] = values[first:]
+
+    self._end = (self._end + n) % c
+    self._size = min(self._size + n, c)
+
+  def view(self):
+    """Return a read-only view of the kept values (oldest first)."""
+    c = self.capacity
+    view = self._buffer[self._end-self._size+c:self._end+c]
+    view.flags.writeable = False
+    return view
+
+# Diagnostics ----------------------------------------------------------
+
+_copy_counters = []
+
+def _record_copy(origin, num=1):
+  """Increment counters of array copies (if any) for the given origin."""
+  for counter in _copy_counters:
+    counter[origin] += num
+
+def _num_arrays(obj):
+  """Return the number of ``numpy.ndarray`` instances
+  in the given (nested) dictionaries, lists and tuples."""
+  num, stack = 0, [obj]
+
+  while stack:
+    obj = stack.pop()
+    if isinstance(obj, np.ndarray):
+      num += 1
+    elif isinstance(obj, dict):
+      stack.extend(obj.values())
+    elif isinstance(obj, (list, tuple)):
+      stack.extend(obj)
+
+  return num
+
+@cl.contextmanager
+def count_array_copies():
+  """Count array copies made while building and showing figures.
+
+  This context manager yields a ``collections.Counter`` instance
+  mapping origin of copies to their numbers:
+
+  - 'plotly': copies made by validators of Plotly's traces
+    (``copy_to_readonly_numpy_array()``).
+  - 'plotly.deepcopy': arrays in properties deep-copied
+    by Plotly's figures, e.g. in ``add_traces()`` and ``to_dict()``
+    (and so in ``show()``, ``write_html()`` etc.).
+  - names of functions of this package for the others.
+
+  Copies made by numpy operations inside Plotly (e.g. serialization
+  by ``PlotlyJSONEncoder``) and in user code are not counted.
+
+  Examples:
+
+  >>> import tk_plot_utils as tk
+  >>> with tk.count_array_copies() as counter:
+  ...   fig = tk.plotly()
+  ...   fig.show(tk.make_heatmap(...))
+  >>> print(counter)
+
+  """
+  try:
+    import _plotly_utils.basevalidators as bv
+  except ImportError:
+    import plotly.basevalidators as bv
+
+  import plotly.basedatatypes as bd
+
+  counter = co.Counter()
+
+  if not _copy_counters:
+    original = bv.copy_to_readonly_numpy_array
+
+    def copy_to_readonly_numpy_array(*args, **kwargs):
+      _record_copy("plotly")
+      return original(*args, **kwargs)
+
+    copy_to_readonly_numpy_array.__wrapped__ = original
+    bv.copy_to_readonly_numpy_array = copy_to_readonly_numpy_array
+
+    original_deepcopy = bd.deepcopy
+
+    def deepcopy(obj, *args, **kwargs):
+      _record_copy("plotly.deepcopy", _num_arrays(obj))
+      return original_deepcopy(obj, *args, **kwargs)
+
+    deepcopy.__wrapped__ = original_deepcopy
+    bd.deepcopy = deepcopy
+
+  _copy_counters.append(counter)
+
+  try:
+    yield counter
+  finally:
+    _copy_counters.remove(counter)
+    if not _copy_counters:
+      bv.copy_to_readonly_numpy_array = (
+        bv.copy_to_readonly_numpy_array.__wrapped__)
+      bd.deepcopy = bd.deepcopy.__wrapped__